@@ -0,0 +1,6 @@
+# This is the robot spawner as a package. Its modules are imported on their own, for example
+# from robot_sim.map import load_map, and nothing is imported here, so a headless script only loads what it
+# uses: the map, spawn and robot modules need numpy alone, OpenCV is imported the first time a map is read,
+# scipy the first time a distance field or spatial query needs it, and matplotlib and tkinter only by the
+# windows. From the repository root, python -m robot_sim opens the interactive map, and the other tools run
+# as python -m robot_sim.<module>.
@@ -0,0 +1,164 @@
+########## Import Libraries ##########
+
+import numpy as np
+import time
+from scipy.optimize import linear_sum_assignment
+from .robot import SENSORS
+
+########## Define Functions and Classes #########
+
+# above this many robot-task pairs per sensor type, "auto" switches from the optimal solver to greedy:
+OPTIMAL_LIMIT = 2000 * 2000
+
+# the fleet columns cost_matrix and allocate read, enough for a sub-fleet taken only to allocate:
+COST_COLUMNS = ("id", "sensor", "weight", "battery", "load")
+
+class Allocation:
+    # this is the result of one allocation. It holds:
+    # - robots and tasks, the row numbers of each assigned (robot, task) pair in the fleet and task arrays
+    # - the cost of each pair and their total
+    # - which solver ran, and how long building the costs and solving took, in seconds
+
+    def __init__(self, robots, tasks, costs, method, build_time, solve_time):
+        self.robots = robots
+        self.tasks = tasks
+        self.costs = costs
+        self.total_cost = float(costs.sum())
+        self.method = method
+        self.build_time = build_time
+        self.solve_time = solve_time
+
+    def __len__(self):
+        return len(self.robots)
+
+    def task_of(self, n_robots):
+        # the task assigned to each robot of the fleet, -1 for robots left without one:
+        assigned = np.full(n_robots, -1, dtype = np.int64)
+        assigned[self.robots] = self.tasks
+        return assigned
+
+    def summary(self):
+        return (f"{len(self)} assignments with {self.method}, total cost {self.total_cost:.2f}, "
+                f"costs built in {self.build_time * 1000:.1f} ms, solved in {self.solve_time * 1000:.1f} ms")
+
+def generate_tasks(sites, n_tasks, rng = None):
+    # this function spawns n_tasks tasks on random sites, each needing either a camera or a measurement robot:
+    rows, sensors = generate_task_rows(len(sites), n_tasks, rng)
+    return sites[rows].astype(np.int64), sensors
+
+def generate_task_rows(n_sites, n_tasks, rng = None):
+    # the same as generate_tasks, returning the row of each task's site instead of its location:
+    rng = rng if rng is not None else np.random.default_rng()
+    rows = rng.integers(0, n_sites, n_tasks)
+    sensors = rng.integers(0, len(SENSORS), n_tasks).astype(np.uint8)
+    return rows, sensors
+
+def euclidean_distances(fleet, task_locations):
+    # straight line distance from every robot to every task, shape (tasks, robots):
+    difference = np.asarray(task_locations, dtype = float)[:, None, :] - fleet.position[None, :, :]
+    return np.hypot(difference[..., 0], difference[..., 1])
+
+def geodesic_distances(field_cache, map_key, fleet, task_locations):
+    # shortest path distance from every robot to every task, shape (tasks, robots), with one distance field
+    # per task from the field cache. The robots' graph nodes are looked up once and shared by every field:
+    nodes = field_cache.graphs[map_key].nodes(fleet.position)
+    reached = np.flatnonzero(nodes >= 0)
+    distances = np.full((len(task_locations), len(nodes)), np.inf)
+    for row, task in enumerate(task_locations):
+        distances[row, reached] = field_cache.field(map_key, task).distance[nodes[reached]]
+    return distances
+
+def cost_matrix(fleet, task_locations, task_sensors, distances = None, load_cost = 1.0, min_battery = 0.0):
+    # this function builds the cost of sending each robot to each task, shape (robots, tasks). The cost is the
+    # travel distance scaled by the robot's movement weight, divided by its battery level so drained robots
+    # are spared, plus load_cost per task the robot has already done. Pairs that can't happen are inf:
+    # - the robot doesn't carry the sensor the task needs
+    # - the robot can't reach the task
+    # - the robot's battery is below min_battery
+    if distances is None:
+        distances = euclidean_distances(fleet, task_locations)
+
+    battery = np.maximum(fleet.battery, 1e-6)
+    costs = distances.T * (fleet.weight / battery)[:, None] + (load_cost * fleet.load)[:, None]
+
+    feasible = fleet.sensor[:, None] == np.asarray(task_sensors)[None, :]
+    feasible &= np.isfinite(costs)
+    feasible &= (fleet.battery >= min_battery)[:, None]
+    return np.where(feasible, costs, np.inf)
+
+def _solve_optimal(costs):
+    # minimum total cost assignment with scipy's Jonker-Volgenant solver. Infeasible pairs are given a cost
+    # above any feasible total, so they are only picked when nothing else is left, and then dropped:
+    finite = np.isfinite(costs)
+    if not finite.any():
+        return np.empty(0, dtype = np.int64), np.empty(0, dtype = np.int64)
+    blocked = costs[finite].sum() + 1.0
+    rows, cols = linear_sum_assignment(np.where(finite, costs, blocked))
+    keep = finite[rows, cols]
+    return rows[keep], cols[keep]
+
+def _solve_greedy(costs):
+    # fast greedy assignment. Each round every free robot picks its cheapest free task, every task keeps the
+    # cheapest robot that picked it, and those pairs are fixed. Every round fixes at least the cheapest
+    # remaining pair, and in practice most of the fleet goes within a few rounds:
+    costs = costs.copy()
+    rows_out, cols_out = [], []
+    free_rows = np.flatnonzero(np.isfinite(costs).any(axis = 1))
+
+    while len(free_rows):
+        sub = costs[free_rows]
+        best_cols = np.argmin(sub, axis = 1)
+        best_costs = sub[np.arange(len(free_rows)), best_cols]
+        reachable = np.isfinite(best_costs)
+        if not reachable.any():
+            break
+        candidates, best_cols, best_costs = free_rows[reachable], best_cols[reachable], best_costs[reachable]
+
+        # for each task, the cheapest robot that chose it:
+        order = np.lexsort((best_costs, best_cols))
+        first = np.r_[True, best_cols[order][1:] != best_cols[order][:-1]]
+        won_rows, won_cols = candidates[order][first], best_cols[order][first]
+
+        rows_out.append(won_rows)
+        cols_out.append(won_cols)
+        costs[:, won_cols] = np.inf
+        free_rows = np.setdiff1d(candidates, won_rows)
+
+    if not rows_out:
+        return np.empty(0, dtype = np.int64), np.empty(0, dtype = np.int64)
+    return np.concatenate(rows_out), np.concatenate(cols_out)
+
+SOLVERS = {'optimal': _solve_optimal, 'greedy': _solve_greedy}
+
+def allocate(fleet, task_locations, task_sensors, distances = None, method = 'auto', costs = None, **cost_options):
+    # this function assigns at most one task to each robot and one robot to each task, respecting the sensor
+    # each task needs. Camera and measurement robots never compete for the same task, so each sensor type is
+    # solved as its own smaller problem. method is "optimal", "greedy", or "auto" to pick by problem size.
+    # costs can be given already built, shape (robots, tasks), instead of from distances and the cost options:
+    start = time.perf_counter()
+    if costs is None:
+        costs = cost_matrix(fleet, task_locations, task_sensors, distances, **cost_options)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    robots, tasks, used = [], [], set()
+    task_sensors = np.asarray(task_sensors)
+    for sensor in range(len(SENSORS)):
+        sensor_robots = np.flatnonzero(fleet.sensor == sensor)
+        sensor_tasks = np.flatnonzero(task_sensors == sensor)
+        if len(sensor_robots) == 0 or len(sensor_tasks) == 0:
+            continue
+
+        solver = method
+        if method == 'auto':
+            solver = 'optimal' if len(sensor_robots) * len(sensor_tasks) <= OPTIMAL_LIMIT else 'greedy'
+        used.add(solver)
+
+        rows, cols = SOLVERS[solver](costs[np.ix_(sensor_robots, sensor_tasks)])
+        robots.append(sensor_robots[rows])
+        tasks.append(sensor_tasks[cols])
+    solve_time = time.perf_counter() - start
+
+    robots = np.concatenate(robots) if robots else np.empty(0, dtype = np.int64)
+    tasks = np.concatenate(tasks) if tasks else np.empty(0, dtype = np.int64)
+    return Allocation(robots, tasks, costs[robots, tasks], '+'.join(sorted(used)) or method, build_time, solve_time)
@@ -0,0 +1,83 @@
+########## Import Libraries ##########
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .map_cache import MapCache
+from .grid_map import preprocess_map
+from .spawn import generate_mission, mission_seed
+from .mission_format import write_mission
+
+########## Define Functions ##########
+
+# the sites each worker process spawns from, memory-mapped from the map cache once per process:
+_sites = None
+
+def _load_sites(cache_root, key):
+    global _sites
+    _sites = MapCache(cache_root).load(key)['sites']
+
+def _mission_worker(job):
+    index, fleet_range, n_tasks, base_seed = job
+    mission = generate_mission(_sites, fleet_range, n_tasks, mission_seed(base_seed, index))
+    mission['index'] = index
+    return mission
+
+def generate_missions(file_path, n_missions, fleet_range = (2,5), n_tasks = 1, base_seed = 0,
+                      buffer = 6, spacing = 4, resolution = 0.05, workers = None, cache = None):
+    # this function generates n_missions missions on one map across a pool of processes, and yields them in
+    # index order. The map is preprocessed once, here, and every worker memory-maps the same cache entry
+    # instead of recomputing it. Mission i always comes out the same for a given base_seed.
+
+    if fleet_range[0] < 2:
+        raise ValueError("A fleet needs at least 2 robots, one camera and one measurement")
+
+    cache = cache or MapCache()
+    cache.preprocess(file_path, buffer, spacing, lambda: preprocess_map(file_path, buffer, spacing, resolution))
+    key = cache.key(file_path, buffer, spacing)
+
+    workers = workers or os.cpu_count()
+    jobs = [(index, fleet_range, n_tasks, base_seed) for index in range(n_missions)]
+    chunksize = max(1, n_missions // (4 * workers))
+
+    with ProcessPoolExecutor(workers, initializer = _load_sites, initargs = (cache.root, key)) as pool:
+        for mission in pool.map(_mission_worker, jobs, chunksize = chunksize):
+            mission['map_key'] = key
+            yield mission
+
+def save_missions(missions, out_dir):
+    # this function writes each mission to its own file in out_dir, named by its index:
+    os.makedirs(out_dir, exist_ok = True)
+    count = 0
+    for mission in missions:
+        write_mission(os.path.join(out_dir, f"mission_{mission['index']:06d}.rmis"), mission['robots'],
+                      mission['task_locations'], mission['map_key'], seed = mission['seed'], index = mission['index'])
+        count += 1
+    return count
+
+#################     Main   #####################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Generate random missions on a map without the GUI.")
+    parser.add_argument('map', help = "path to the map png")
+    parser.add_argument('-n', '--missions', type = int, default = 100, help = "number of missions to generate")
+    parser.add_argument('--fleet-min', type = int, default = 2, help = "smallest fleet size")
+    parser.add_argument('--fleet-max', type = int, default = 5, help = "largest fleet size")
+    parser.add_argument('--tasks', type = int, default = 1, help = "number of tasks per mission")
+    parser.add_argument('--seed', type = int, default = 0, help = "base seed, mission seeds are derived from it")
+    parser.add_argument('--buffer', type = int, default = 6, help = "spacing used to scale back spawnable space from the border")
+    parser.add_argument('--spacing', type = int, default = 4, help = "spacing between spawnable sites")
+    parser.add_argument('--resolution', type = float, default = 0.05, help = "map resolution in metres per pixel")
+    parser.add_argument('--workers', type = int, default = None, help = "number of worker processes, defaults to one per core")
+    parser.add_argument('-o', '--out', default = 'missions', help = "directory to write the missions to")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    missions = generate_missions(args.map, args.missions, (args.fleet_min, args.fleet_max), args.tasks, args.seed,
+                                 args.buffer, args.spacing, args.resolution, args.workers)
+    count = save_missions(missions, args.out)
+    print(f"Generated {count} missions in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
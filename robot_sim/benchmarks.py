@@ -0,0 +1,190 @@
+########## Import Libraries ##########
+
+import numpy as np
+import argparse
+import cv2
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from .grid_map import GridMap
+from .sites import sites_from_mask
+from .spawn import spawner, generate_robots
+from .fleet import RobotFleet
+from .mission_format import write_mission
+
+########## Define Functions ##########
+
+# Every result is one JSON object per line, appended to the output file, so runs from different commits
+# can be kept in one file and compared. Each holds the stage, the map and its size, the buffer where it
+# matters, the best wall time over the repeats, the peak memory traced while running the stage once,
+# and the throughput in items per second (pixels for the map stages, robots or spawns for the rest).
+# Memory is traced with tracemalloc, which only sees allocations made through Python and numpy. OpenCV
+# allocates its own buffers, so stages that run in OpenCV are marked with peak_excludes = 'opencv', and
+# their peak is a lower bound.
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'maps')
+
+def run_info():
+    # this function describes the machine and the code the benchmarks ran on:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True,
+                                cwd = os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'opencv': cv2.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+def measure(function, repeat = 3):
+    # this function returns (best wall time in seconds, peak traced memory in bytes, last result). Memory is
+    # traced on a separate run, since tracing slows the timed runs down:
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, peak, result
+
+def synthetic_map(size, out_dir, source = 'blob3_map.png'):
+    # this function upscales one of the maps to size x size pixels, and writes it next to the other temporary files:
+    image = cv2.imread(os.path.join(MAPS_DIR, source), 0)
+    image = cv2.resize(image, (size, size), interpolation = cv2.INTER_NEAREST)
+    file_path = os.path.join(out_dir, f'synthetic_{size}.png')
+    cv2.imwrite(file_path, image)
+    return file_path
+
+def benchmark_map(file_path, buffers, repeat, robots, render_limit, out_dir):
+    # this function runs every pipeline stage on one map, and returns one result per stage and buffer:
+    results = []
+    name = os.path.basename(file_path)
+
+    def record(stage, seconds, peak, items, **extra):
+        results.append(dict(stage = stage, map = name, width = grid_map.shape[1], height = grid_map.shape[0],
+                            seconds = seconds, peak_bytes = peak, items = items,
+                            throughput = items / seconds if seconds > 0 else None, **extra))
+
+    # Step 1 - read map:
+    seconds, peak, grid_map = measure(lambda: GridMap.read(file_path), repeat)
+    pixels = grid_map.shape[0] * grid_map.shape[1]
+    record('read_map', seconds, peak, pixels, peak_excludes = 'opencv')
+
+    for buffer in buffers:
+        # Step 2 - spawnable space:
+        seconds, peak, spawnable = measure(lambda: grid_map.spawnable_mask(buffer), repeat)
+        record('spawnable_space', seconds, peak, pixels, buffer = buffer, peak_excludes = 'opencv')
+
+        # Step 3 - spawnable sites:
+        seconds, peak, sites = measure(lambda: sites_from_mask(spawnable, 4), repeat)
+        record('spawnable_sites', seconds, peak, pixels, buffer = buffer, sites = len(sites))
+
+    if len(sites) == 0:
+        return results
+
+    # Step 4 - spawning, one site at a time as the GUI does:
+    seconds, peak, _ = measure(lambda: [spawner(sites) for _ in range(robots)], repeat)
+    record('spawner', seconds, peak, robots)
+
+    # Step 5 - robot creation, as a dictionary of Robot objects and as a RobotFleet:
+    seconds, peak, _ = measure(lambda: generate_robots(sites, (robots, robots)), repeat)
+    record('robots_dict', seconds, peak, robots)
+    seconds, peak, fleet = measure(lambda: RobotFleet.generate(sites, n_robots = robots), repeat)
+    record('robot_fleet', seconds, peak, robots)
+
+    # Step 6 - saving the mission:
+    mission_path = os.path.join(out_dir, 'benchmark.rmis')
+    seconds, peak, _ = measure(lambda: write_mission(mission_path, fleet, sites[:1], 'benchmark'), repeat)
+    record('save_mission', seconds, peak, robots, bytes = os.path.getsize(mission_path))
+
+    # Step 7 - drawing, on an off-screen canvas, for maps small enough to draw as one image:
+    if max(grid_map.shape) <= render_limit:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        from .map_render import MapRenderer
+
+        figures = []
+
+        def first_render():
+            # building the renderer and the first full draw, which is the part that grows with the map. Each run
+            # draws on a new figure, and only the last one is kept for the stages after:
+            for figure in figures:
+                plt.close(figure)
+            figures[:] = [plt.figure(figsize = (10, 8))]
+            renderer = MapRenderer(figures[0].add_subplot(111), figures[0].canvas,
+                                   grid_map.body_mask, grid_map.border_mask, spawnable)
+            figures[0].canvas.draw()
+            return renderer
+
+        seconds, peak, renderer = measure(first_render, 1)
+        figure = figures[0]
+        record('update_display_first', seconds, peak, pixels)
+
+        seconds, peak, _ = measure(lambda: renderer.set_fleet(fleet.position[:5]), repeat)
+        record('update_display_fleet', seconds, peak, 5)
+        seconds, peak, _ = measure(lambda: renderer.move_robots(fleet.position[:5]), repeat)
+        record('update_display_move', seconds, peak, 5)
+        plt.close(figure)
+
+    # Step 8 - simulation, with tasks arriving and respawning, timed after the fields of the task pool are
+    # computed. Limited like drawing, since the navigation graph and the fields grow with the map:
+    if max(grid_map.shape) <= render_limit:
+        from .simulation import MissionSimulation
+        rng = np.random.default_rng(0)
+        simulation_fleet = RobotFleet.generate(sites, n_robots = min(robots, 300), rng = rng)
+        simulation_fleet.battery[:] = 1.0
+        simulation = MissionSimulation(simulation_fleet, sites, spawnable, n_tasks = 20, rng = rng).run(1000)
+        completed = simulation.completed
+        seconds, peak, _ = measure(lambda: simulation.run(200), repeat)
+        record('simulation_steps', seconds, peak, 200, robots = len(simulation_fleet), tasks = 20,
+               arrivals = (simulation.completed - completed) / (repeat + 1))
+
+    return results
+
+def run(maps = None, sizes = (2000, 5000, 10000), buffers = (2, 6, 12), repeat = 3, robots = 1000,
+        render_limit = 2000, out = 'benchmark_results.jsonl'):
+    # this function benchmarks every map in maps/ (or the given ones) and the synthetic sizes, appending the
+    # results to out and returning them:
+    random.seed(0)
+    info = run_info()
+    paths = maps or sorted(os.path.join(MAPS_DIR, name) for name in os.listdir(MAPS_DIR) if name.endswith('.png'))
+    results = []
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        paths = list(paths) + [synthetic_map(size, out_dir) for size in sizes]
+        for file_path in paths:
+            for result in benchmark_map(file_path, buffers, repeat, robots, render_limit, out_dir):
+                result.update(info)
+                results.append(result)
+                print(f"{result['stage']:<22} {result['map']:<22} {result['width']:>6}x{result['height']:<6} "
+                      f"buffer {str(result.get('buffer', '-')):<3} {result['seconds'] * 1000:>10.2f} ms "
+                      f"{result['peak_bytes'] / 2**20:>9.1f} MiB{' *' if 'peak_excludes' in result else ''}")
+    print("* peak memory is traced with tracemalloc, which doesn't see the buffers OpenCV allocates itself, so it is "
+          "under-reported for the stages that run in OpenCV")
+
+    with open(out, 'a') as file:
+        for result in results:
+            file.write(json.dumps(result) + '\n')
+    return results
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the map to mission pipeline.")
+    parser.add_argument('--maps', nargs = '*', default = None, help = "maps to run, every map in maps/ by default")
+    parser.add_argument('--sizes', nargs = '*', type = int, default = [2000, 5000, 10000], help = "sides of the synthetic maps")
+    parser.add_argument('--buffers', nargs = '*', type = int, default = [2, 6, 12], help = "buffer values to run")
+    parser.add_argument('--repeat', type = int, default = 3, help = "timed runs per stage, the best is kept")
+    parser.add_argument('--robots', type = int, default = 1000, help = "robots to spawn, create and save")
+    parser.add_argument('--render-limit', type = int, default = 2000, help = "largest map side to benchmark drawing on")
+    parser.add_argument('-o', '--out', default = 'benchmark_results.jsonl', help = "file to append the results to")
+    args = parser.parse_args()
+    run(args.maps, args.sizes, args.buffers, args.repeat, args.robots, args.render_limit, args.out)
@@ -0,0 +1,126 @@
+########## Import Libraries ##########
+
+import numpy as np
+import os
+
+########## Define Functions ##########
+
+# cv2 is imported inside the functions that use it, so modules that only need points_to_mask (sites, and
+# through it everything that handles sites and missions) import without loading OpenCV.
+
+# the square window used by spawnable_space is the chebyshev ball of radius buffer, so both
+# metrics are handled by the same engine:
+METRICS = ("square", "euclidean")
+
+def points_to_mask(points, shape):
+    # this function rasterizes an (N,2) array of x,y points into a boolean mask of the given (height, width)
+    mask = np.zeros(shape, dtype = bool)
+    points = np.asarray(points).reshape(-1, 2)
+    if len(points):
+        mask[points[:,1], points[:,0]] = True
+    return mask
+
+def border_clearance(border_mask, metric = "square"):
+    # this function returns, for every pixel, the distance to the nearest border pixel, measured
+    # either with the square window (chebyshev) or with true euclidean distance
+
+    if metric not in METRICS:
+        raise ValueError(f"Unknown clearance metric: {metric}")
+
+    # with no border at all, everything is infinitely far away:
+    if not border_mask.any():
+        return np.full(border_mask.shape, np.inf, dtype = np.float32)
+
+    import cv2
+
+    # distanceTransform measures distance to the nearest zero pixel, so the border must be zero:
+    src = np.where(border_mask, 0, 255).astype(np.uint8)
+    if metric == "square":
+        return cv2.distanceTransform(src, cv2.DIST_C, 3)
+    return cv2.distanceTransform(src, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+
+def clear_mask(border_mask, buffer, metric = "square"):
+    # this function returns a mask of every pixel with no border point within buffer:
+
+    if metric == "square":
+        import cv2
+
+        # a single dilation by the (2*buffer+1) square window is exact and cheaper than a distance transform:
+        kernel = np.ones((2*buffer + 1, 2*buffer + 1), dtype = np.uint8)
+        blocked = cv2.dilate(border_mask.astype(np.uint8), kernel)
+        return blocked == 0
+
+    # squared euclidean distances between pixels are whole numbers, so round them before comparing to
+    # keep float error in the transform from flipping points that sit exactly on the buffer:
+    distance = border_clearance(border_mask, metric)
+    return np.rint(distance * distance) > buffer * buffer
+
+def spawnable_mask(body_mask, border_mask, buffer, metric = "square"):
+    # this function determines the spawnable space as a mask, on the whole image at once
+    return body_mask & clear_mask(border_mask, buffer, metric)
+
+def spawnable_points(body, border, buffer, metric = "square"):
+    # drop-in replacement for the per-pixel spawnable_space loop. It takes and returns (N,2) x,y point
+    # arrays, and keeps the surviving body points in the same order they were given in
+
+    body = np.asarray(body).reshape(-1, 2)
+    border = np.asarray(border).reshape(-1, 2)
+    if len(body) == 0:
+        return body
+
+    # size the mask so it holds every point of both arrays:
+    width = int(max(body[:,0].max(), border[:,0].max() if len(border) else 0)) + 1
+    height = int(max(body[:,1].max(), border[:,1].max() if len(border) else 0)) + 1
+
+    clear = clear_mask(points_to_mask(border, (height, width)), buffer, metric)
+    return body[clear[body[:,1], body[:,0]]]
+
+########## Regression Check ##########
+
+def reference_spawnable_space(body, border, buffer):
+    # this is the original per-pixel spawnable_space loop, kept as the ground truth for the check below
+    border_set = set(map(tuple,border))
+    spawnable = []
+    for point in body:
+        x,y = point
+        is_spawnable = True
+        for dx in range(-buffer, buffer + 1):
+            for dy in range(-buffer, buffer + 1):
+                if (x + dx, y + dy) in border_set:
+                    is_spawnable = False
+                    break
+            if not is_spawnable:
+                break
+        if is_spawnable:
+            spawnable.append(point)
+    return np.array(spawnable).reshape(-1, 2)
+
+def check_maps(buffers = (0, 1, 4, 6)):
+    # this function compares the clearance engine against the reference loop on every map in maps/
+    import cv2
+
+    from .map import MAPS_DIR
+    failures = 0
+
+    for map_name in sorted(os.listdir(MAPS_DIR)):
+        if not map_name.endswith('.png'):
+            continue
+        image = cv2.imread(os.path.join(MAPS_DIR, map_name), 0)
+
+        # same point layout as read_map:
+        body = np.flip(np.column_stack(np.where(np.flipud(image) >= 254)), axis = 1)
+        border = np.flip(np.column_stack(np.where(np.flipud(image) == 0)), axis = 1)
+
+        for buffer in buffers:
+            expected = reference_spawnable_space(body, border, buffer)
+            result = spawnable_points(body, border, buffer)
+            ok = np.array_equal(expected, result)
+            failures += not ok
+            print(f"{map_name:<20} buffer = {buffer:<3} {'OK' if ok else 'MISMATCH'}")
+
+    return failures
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    raise SystemExit(1 if check_maps() else 0)
@@ -0,0 +1,237 @@
+########## Import Libraries ##########
+
+import numpy as np
+from collections import OrderedDict
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+########## Define Functions and Classes #########
+
+# the 8-connected neighbourhood, as (dy, dx, step length). Every node has one edge slot per neighbour:
+NEIGHBOURS = ((0, 1, 1.0), (1, 0, 1.0), (0, -1, 1.0), (-1, 0, 1.0),
+              (1, 1, np.sqrt(2)), (1, -1, np.sqrt(2)), (-1, 1, np.sqrt(2)), (-1, -1, np.sqrt(2)))
+
+def _shifted(shape, dy, dx):
+    # the cells of a grid whose neighbour at (dy, dx) is inside the grid, as a pair of slices (from, to):
+    height, width = shape
+    rows_from, rows_to = slice(max(0, -dy), height - max(0, dy)), slice(max(0, dy), height - max(0, -dy))
+    cols_from, cols_to = slice(max(0, -dx), width - max(0, dx)), slice(max(0, dx), width - max(0, -dx))
+    return (rows_from, cols_from), (rows_to, cols_to)
+
+class NavigationGraph:
+    # this is the 8-connected grid graph over the traversable cells of a map (normally the spawnable mask).
+    # Diagonal steps are only allowed when both cells they cut past are traversable too, so paths never squeeze
+    # through the corner of a wall. Every pixel is a node, numbered y * width + x, with one edge slot per
+    # neighbour holding the step length, or inf where the step isn't allowed, which dijkstra never takes. Cells
+    # that aren't traversable are nodes without usable edges. So node numbers and the csr layout never change,
+    # and an edit only rewrites the slots around it, in place.
+
+    def __init__(self, traversable, resolution = 1.0):
+        self.traversable = np.array(traversable, dtype = bool)
+        self.shape = self.traversable.shape
+        self.resolution = resolution
+        height, width = self.shape
+        n = height * width
+        index = np.int32 if n * len(NEIGHBOURS) < 2**31 else np.int64
+
+        # the neighbour node of every slot, the node itself where the neighbour is off the grid:
+        node = np.arange(n, dtype = index).reshape(self.shape)
+        self.neighbours = np.repeat(node[:, :, None], len(NEIGHBOURS), axis = 2)
+        for k, (dy, dx, length) in enumerate(NEIGHBOURS):
+            here, there = _shifted(self.shape, dy, dx)
+            self.neighbours[here + (k,)] = node[there]
+        self.lengths = np.empty((height, width, len(NEIGHBOURS)))
+        self._set_lengths((0, height, 0, width))
+
+        # the csr matrix shares lengths, so rewriting slots updates the graph dijkstra sees:
+        indptr = np.arange(0, n * len(NEIGHBOURS) + 1, len(NEIGHBOURS), dtype = index)
+        self.graph = csr_matrix((self.lengths.reshape(-1), self.neighbours.reshape(-1), indptr), shape = (n, n), copy = False)
+
+    def _set_lengths(self, region):
+        # this function rewrites the edge slots of the cells in region (y0, y1, x0, x1) from the traversable
+        # mask, which it reads one cell further out, as untraversable off the grid:
+        y0, y1, x0, x1 = region
+        height, width = self.shape
+        padded = np.zeros((y1 - y0 + 2, x1 - x0 + 2), dtype = bool)
+        wy0, wy1, wx0, wx1 = max(0, y0 - 1), min(height, y1 + 1), max(0, x0 - 1), min(width, x1 + 1)
+        padded[wy0 - y0 + 1:wy1 - y0 + 1, wx0 - x0 + 1:wx1 - x0 + 1] = self.traversable[wy0:wy1, wx0:wx1]
+
+        def at(dy, dx):
+            return padded[1 + dy:y1 - y0 + 1 + dy, 1 + dx:x1 - x0 + 1 + dx]
+
+        for k, (dy, dx, length) in enumerate(NEIGHBOURS):
+            linked = at(0, 0) & at(dy, dx)
+            if dy and dx:
+                linked &= at(0, dx) & at(dy, 0)
+            self.lengths[y0:y1, x0:x1, k] = np.where(linked, length * self.resolution, np.inf)
+
+    def update(self, region, traversable):
+        # this function writes the traversable cells of region (y0, y1, x0, x1), and rewrites the edges of the
+        # cells within one cell of it, which are all the edges the change can touch:
+        y0, y1, x0, x1 = region
+        height, width = self.shape
+        self.traversable[y0:y1, x0:x1] = traversable
+        self._set_lengths((max(0, y0 - 1), min(height, y1 + 1), max(0, x0 - 1), min(width, x1 + 1)))
+
+    def nodes(self, points):
+        # node number of each x,y point, -1 for points off the grid or off the traversable cells:
+        points = np.asarray(points).reshape(-1, 2)
+        x, y = points[:,0], points[:,1]
+        inside = (x >= 0) & (y >= 0) & (x < self.shape[1]) & (y < self.shape[0])
+        nodes = np.full(len(points), -1, dtype = np.int64)
+        x, y = x[inside], y[inside]
+        nodes[inside] = np.where(self.traversable[y, x], y * self.shape[1] + x, -1)
+        return nodes
+
+    def points(self, nodes):
+        # the x,y point of each node, as an (N,2) array:
+        y, x = np.divmod(np.asarray(nodes, dtype = np.int64), self.shape[1])
+        return np.column_stack((x, y))
+
+    def field(self, source):
+        # this function runs one dijkstra wavefront out from the source point over the whole graph:
+        node = self.nodes(source)[0]
+        if node < 0:
+            raise ValueError(f"Source {tuple(np.ravel(source))} is not on a traversable cell")
+        distance, predecessors = dijkstra(self.graph, directed = True, indices = node, return_predecessors = True)
+        return DistanceField(self, np.ravel(source), distance, predecessors)
+
+class DistanceField:
+    # this is the shortest path distance from one source (a task location) to every traversable cell. One
+    # field answers the distance of every robot on the map, and holds the paths back to the source.
+
+    def __init__(self, graph, source, distance, predecessors):
+        self.graph = graph
+        self.source = source
+        self.distance = distance            # per node, inf where the source can't be reached
+        self.predecessors = predecessors    # per node, the next node towards the source
+
+    @property
+    def grid(self):
+        # the field as a grid indexed [y, x], inf off the traversable cells:
+        return self.distance.reshape(self.graph.shape).copy()
+
+    def distances(self, points):
+        # shortest path distance from each x,y point to the source, inf if it can't get there:
+        nodes = self.graph.nodes(points)
+        result = np.full(len(nodes), np.inf)
+        result[nodes >= 0] = self.distance[nodes[nodes >= 0]]
+        return result
+
+    def weighted_distances(self, points, weights):
+        # distances scaled by each robot's movement weight:
+        return self.distances(points) * np.asarray(weights)
+
+    def path(self, point):
+        # this function walks the predecessors from point back to the source, and returns the path as an
+        # (N,2) array of x,y points, starting at point and ending at the source. None if there is no path:
+        node = self.graph.nodes(point)[0]
+        if node < 0 or not np.isfinite(self.distance[node]):
+            return None
+        nodes = [node]
+        while self.predecessors[node] >= 0:
+            node = self.predecessors[node]
+            nodes.append(node)
+        return self.graph.points(nodes)
+
+class FieldCache:
+    # this is an in-memory cache of distance fields per (map, task). Fields are computed the first time a
+    # task is asked for, and the least recently used ones are dropped past max_fields.
+
+    def __init__(self, max_fields = 64):
+        self.max_fields = max_fields
+        self.graphs = {}
+        self.fields = OrderedDict()
+
+    def add_map(self, map_key, traversable, resolution = 1.0):
+        if map_key not in self.graphs:
+            self.graphs[map_key] = NavigationGraph(traversable, resolution)
+        return self.graphs[map_key]
+
+    def field(self, map_key, task):
+        key = (map_key, *map(int, np.ravel(task)))
+        if key in self.fields:
+            self.fields.move_to_end(key)
+            return self.fields[key]
+
+        field = self.graphs[map_key].field(task)
+        self.fields[key] = field
+        while len(self.fields) > self.max_fields:
+            self.fields.popitem(last = False)
+        return field
+
+    def stack(self, map_key, tasks):
+        # the fields of a set of tasks (an (N,2) array of x,y points) stacked into one FieldStack:
+        return FieldStack(self.graphs[map_key], [self.field(map_key, task) for task in np.asarray(tasks).reshape(-1, 2)])
+
+    def update_map(self, map_key, region, previous, current):
+        # this function updates the graph of an edited map, where the traversable cells only changed inside
+        # region (y0, y1, x0, x1), from previous to current (both the size of region). A field can only change
+        # if the source reached a removed cell, or a cell next to an added one, so only those fields are
+        # dropped, to be recomputed when next asked for. Node numbers don't change, so the others stay as they
+        # are. Returns the number of fields dropped:
+        graph = self.graphs[map_key]
+        y0, y1, x0, x1 = region
+        previous, current = np.asarray(previous, dtype = bool), np.asarray(current, dtype = bool)
+        removed = np.argwhere(previous & ~current) + (y0, x0)
+        added = np.argwhere(current & ~previous) + (y0, x0)
+        if len(removed) == 0 and len(added) == 0:
+            return 0
+
+        # the nodes whose distance decides whether a field is touched, the removed cells and every cell around
+        # an added one:
+        near = (added[:, None, :] + np.array([(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1)])[None]).reshape(-1, 2)
+        cells = np.vstack((removed, near))
+        cells = cells[(cells >= 0).all(axis = 1) & (cells[:,0] < graph.shape[0]) & (cells[:,1] < graph.shape[1])]
+        check = np.unique(cells[:,0] * graph.shape[1] + cells[:,1])
+        graph.update(region, current)
+
+        dropped = 0
+        for key in [key for key in self.fields if key[0] == map_key]:
+            if np.isfinite(self.fields[key].distance[check]).any():
+                del self.fields[key]
+                dropped += 1
+        return dropped
+
+    def invalidate(self, map_key):
+        # drops the graph and every field of one map, for when the map changes:
+        self.graphs.pop(map_key, None)
+        for key in [key for key in self.fields if key[0] == map_key]:
+            del self.fields[key]
+
+class FieldStack:
+    # this is the distance fields of a few sources (the task pool of a simulation) stacked into one array over
+    # the traversable cells, one row per source, so the distances between any robots and any sources are a
+    # single fancy index. Each cell also holds its next cell towards every source, so robots can follow the
+    # fields a step at a time without walking whole paths. Columns are the traversable cells when the stack is
+    # made, a stack doesn't follow later edits of the map.
+
+    def __init__(self, graph, fields):
+        self.graph = graph
+        self.cells = np.flatnonzero(graph.traversable)    # node number of each column
+        index = np.int32 if len(self.cells) < 2**31 else np.int64
+        self.distance = np.empty((len(fields), len(self.cells)), dtype = np.float32)
+        self.next = np.empty((len(fields), len(self.cells)), dtype = index)    # -1 at the source and off it
+        for row, field in enumerate(fields):
+            self.set(row, field)
+
+    def set(self, row, field):
+        # this function writes a field into a row of the stack, replacing the source that was there:
+        self.distance[row] = field.distance[self.cells]
+        predecessors = field.predecessors[self.cells]
+        self.next[row] = np.where(predecessors >= 0, np.searchsorted(self.cells, predecessors), -1)
+
+    def columns(self, points):
+        # column of each x,y point, -1 for points that weren't on a traversable cell when the stack was made:
+        nodes = self.graph.nodes(points)
+        columns = np.minimum(np.searchsorted(self.cells, nodes), len(self.cells) - 1)
+        return np.where((nodes >= 0) & (self.cells[columns] == nodes), columns, -1)
+
+    def points(self, columns):
+        return self.graph.points(self.cells[columns])
+
+    def distances(self, rows, columns):
+        # distance from each column to the source of each row, shape (rows, columns), inf for columns of -1:
+        columns = np.asarray(columns)
+        distances = self.distance[np.ix_(rows, np.maximum(columns, 0))]
+        return np.where(columns[None, :] >= 0, distances, np.inf)
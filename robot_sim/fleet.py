@@ -0,0 +1,170 @@
+########## Import Libraries ##########
+
+import numpy as np
+from .robot import SENSORS, LOCOMOTIONS, WEIGHT_RANGES
+from .site_index import SiteIndex
+
+########## Define Functions and Classes #########
+
+# the weight offset ranges as arrays indexed by locomotion code, so a whole fleet samples in one call:
+WEIGHT_LOW = np.array([WEIGHT_RANGES[name][0] for name in LOCOMOTIONS])
+WEIGHT_HIGH = np.array([WEIGHT_RANGES[name][1] for name in LOCOMOTIONS])
+
+def sample_weights(locomotion, rng):
+    # vectorized sample_weight, for an array of locomotion codes:
+    a = rng.uniform(WEIGHT_LOW[locomotion], WEIGHT_HIGH[locomotion])
+    return np.round(1.00 + a*rng.random(len(locomotion)), 2)
+
+class RobotView:
+    # this is a thin view of one row of a RobotFleet, which reads and writes straight through to the fleet's
+    # columns. It has the same attributes and display_robot_info as Robot, so code written against a dict
+    # of Robot objects keeps working.
+
+    __slots__ = ("_fleet", "_row")
+
+    def __init__(self, fleet, row):
+        object.__setattr__(self, "_fleet", fleet)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name):
+        fleet, row = self._fleet, self._row
+        if name == "sensor":
+            return SENSORS[fleet.sensor[row]]
+        if name == "locomotion":
+            return LOCOMOTIONS[fleet.locomotion[row]]
+        if name in RobotFleet.COLUMNS:
+            value = getattr(fleet, name)[row]
+            return value if name == "position" else value.item()
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        fleet, row = self._fleet, self._row
+        if name == "sensor":
+            fleet.sensor[row] = SENSORS.index(value)
+        elif name == "locomotion":
+            fleet.locomotion[row] = LOCOMOTIONS.index(value)
+        elif name in RobotFleet.COLUMNS:
+            getattr(fleet, name)[row] = value
+        else:
+            raise AttributeError(name)
+
+    def randomize_attributes(self, rng = None):
+        self._fleet.randomize_attributes(rng, rows = [self._row])
+
+    # method of querying the robot, as in Robot:
+    def display_robot_info(self):
+        return (f"Robot ID: {self.id}\n"
+                f"Sensor Type: {self.sensor}\n"
+                f"Mode of Locomotion: {self.locomotion}\n"
+                f"Movement Weight: {self.weight}\n"
+                f"Battery Level: {self.battery}\n"
+                f"Load History: {self.load}\n"
+                f"Current Position: {self.position}\n"
+                f"Travelled Distance: {self.travelled_distance}")
+
+class RobotFleet:
+    # this is a whole fleet of robots held as one numpy column per attribute, instead of one Robot object each:
+    # - id, the robot ID tag
+    # - sensor and locomotion, as codes into SENSORS and LOCOMOTIONS
+    # - weight, battery, load and travelled_distance
+    # - position, as an (N,2) array of x,y points
+    # Iterating it like the robots dictionary (keys, values, items) hands out RobotView rows named robot1..robotN.
+
+    COLUMNS = ("id", "sensor", "locomotion", "weight", "battery", "load", "position", "travelled_distance")
+
+    def __init__(self, n):
+        self.id = np.arange(1, n + 1, dtype = np.int32)
+        self.sensor = np.zeros(n, dtype = np.uint8)
+        self.locomotion = np.zeros(n, dtype = np.uint8)
+        self.weight = np.ones(n, dtype = np.float64)
+        self.battery = np.ones(n, dtype = np.float64)
+        self.load = np.zeros(n, dtype = np.int32)
+        self.position = np.zeros((n, 2), dtype = np.int64)
+        self.travelled_distance = np.zeros(n, dtype = np.float64)
+
+    @classmethod
+    def generate(cls, sites, n_robots = None, n_camera = None, fleet_range = (2,5), rng = None, separation = 0,
+                 locomotion_mix = None):
+        # this function generates a random fleet, as generate_robots does. The fleet size is drawn from
+        # fleet_range unless n_robots is given, and the number of camera robots is drawn from 1 to n_robots-1
+        # unless n_camera is given. Camera robots come first, then measurement robots. sites can be a SiteIndex,
+        # and with a separation the robots are spawned at least that many pixels apart. locomotion_mix is the
+        # probability of each mode of locomotion, in LOCOMOTIONS order, uniform by default.
+        rng = rng if rng is not None else np.random.default_rng()
+        n = n_robots if n_robots is not None else int(rng.integers(fleet_range[0], fleet_range[1] + 1))
+        n_camera = n_camera if n_camera is not None else int(rng.integers(1, n))
+
+        fleet = cls(n)
+        fleet.sensor[n_camera:] = SENSORS.index("Measurement")
+        fleet.randomize_attributes(rng, locomotion_mix = locomotion_mix)
+        fleet.randomize_positions(sites, rng, separation)
+        return fleet
+
+    @classmethod
+    def from_robots(cls, robots):
+        # this function builds a fleet from a dictionary of Robot objects:
+        robots = list(robots.values())
+        fleet = cls(len(robots))
+        for row, robot in enumerate(robots):
+            view = fleet[row]
+            for name in cls.COLUMNS:
+                setattr(view, name, getattr(robot, name))
+        return fleet
+
+    def __len__(self):
+        return len(self.id)
+
+    def __getitem__(self, row):
+        return RobotView(self, row)
+
+    def keys(self):
+        return [f"robot{id}" for id in self.id]
+
+    def values(self):
+        return [RobotView(self, row) for row in range(len(self))]
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def randomize_attributes(self, rng = None, rows = None, locomotion_mix = None):
+        # this function draws a new locomotion, movement weight and battery level for every robot, or only for
+        # rows. Locomotion is uniform unless a locomotion_mix of probabilities is given:
+        rng = rng if rng is not None else np.random.default_rng()
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        if locomotion_mix is None:
+            self.locomotion[rows] = rng.integers(0, len(LOCOMOTIONS), len(rows))
+        else:
+            self.locomotion[rows] = rng.choice(len(LOCOMOTIONS), len(rows), p = locomotion_mix)
+        self.weight[rows] = sample_weights(self.locomotion[rows], rng)
+        self.battery[rows] = np.round(rng.uniform(0.3, 1.0, len(rows)), 2)
+
+    def randomize_positions(self, sites, rng = None, separation = 0, exclude = None):
+        # this function spawns every robot on a random site, as spawner does one at a time. With a separation,
+        # the robots land on distinct sites at least that far apart, and that far from the points in exclude:
+        rng = rng if rng is not None else np.random.default_rng()
+        if separation > 0 or exclude is not None:
+            self.position[:] = SiteIndex.of(sites).spawn_points(len(self), separation, rng, exclude)
+            return
+        sites = sites.sites if isinstance(sites, SiteIndex) else sites
+        self.position[:] = sites[rng.integers(0, len(sites), len(self))]
+
+    def select(self, mask = None, sensor = None, locomotion = None):
+        # this function returns the sub-fleet matching a boolean mask and/or a sensor and locomotion name:
+        keep = np.ones(len(self), dtype = bool) if mask is None else np.asarray(mask, dtype = bool)
+        if sensor is not None:
+            keep &= self.sensor == SENSORS.index(sensor)
+        if locomotion is not None:
+            keep &= self.locomotion == LOCOMOTIONS.index(locomotion)
+
+        fleet = RobotFleet(0)
+        for name in self.COLUMNS:
+            setattr(fleet, name, getattr(self, name)[keep])
+        return fleet
+
+    def take(self, rows, columns = None):
+        # this function returns the sub-fleet of the given row numbers, in that order. With columns, only those
+        # are copied, and the others are left empty, for hot loops that only read a few of them:
+        fleet = RobotFleet(0)
+        for name in self.COLUMNS if columns is None else columns:
+            setattr(fleet, name, getattr(self, name)[rows])
+        return fleet
@@ -0,0 +1,250 @@
+########## Import Libraries ##########
+
+import numpy as np
+
+########## Define Functions and Classes #########
+
+# Largest difference allowed between FuzzySystem.evaluate and a skfuzzy ControlSystemSimulation of the same
+# system, on outputs in [0, 1]. The lookup table mode, at its default 21 points per input, trades accuracy for
+# speed: its mean difference is around 2e-3, but next to the steepest rule boundaries it can reach 0.1, so it
+# is meant for ranking large fleets rather than for exact scores.
+FIS_TOLERANCE = 1e-3
+LOOKUP_TOLERANCE = 1e-1
+
+def trimf(x, a, b, c):
+    # triangular membership function, with the same conventions as skfuzzy.trimf:
+    x = np.asarray(x, dtype = float)
+    y = np.zeros_like(x)
+    if a != b:
+        rising = (a < x) & (x < b)
+        y[rising] = (x[rising] - a) / (b - a)
+    if b != c:
+        falling = (b < x) & (x < c)
+        y[falling] = (c - x[falling]) / (c - b)
+    y[x == b] = 1.0
+    return y
+
+def trapmf(x, a, b, c, d):
+    # trapezoidal membership function, with the same conventions as skfuzzy.trapmf:
+    x = np.asarray(x, dtype = float)
+    y = np.minimum(trimf(x, a, b, b), 1.0)
+    y = np.maximum(y, trimf(x, c, c, d))
+    y[(b <= x) & (x <= c)] = 1.0
+    return y
+
+MEMBERSHIP_FUNCTIONS = {'trimf': trimf, 'trapmf': trapmf}
+
+# the robot suitability system. Inputs are the robot's battery level, load history, movement weight, and its
+# distance to the task as a fraction of the longest distance considered. Each variable is
+# (universe low, universe high, {term: (membership function, parameters)}):
+SUITABILITY_INPUTS = {
+    'battery': (0.0, 1.0, {'low': ('trimf', (0.0, 0.0, 0.5)),
+                           'medium': ('trimf', (0.2, 0.5, 0.8)),
+                           'high': ('trimf', (0.5, 1.0, 1.0))}),
+    'load': (0.0, 10.0, {'low': ('trimf', (0.0, 0.0, 4.0)),
+                         'medium': ('trimf', (2.0, 5.0, 8.0)),
+                         'high': ('trapmf', (6.0, 8.0, 10.0, 10.0))}),
+    'weight': (0.9, 1.2, {'good': ('trimf', (0.9, 0.9, 1.05)),
+                          'average': ('trimf', (0.95, 1.025, 1.1)),
+                          'poor': ('trimf', (1.0, 1.2, 1.2))}),
+    'distance': (0.0, 1.0, {'near': ('trimf', (0.0, 0.0, 0.4)),
+                            'mid': ('trimf', (0.2, 0.5, 0.8)),
+                            'far': ('trimf', (0.6, 1.0, 1.0))}),
+}
+SUITABILITY_OUTPUT = ('suitability', 0.0, 1.0, {'very_low': ('trimf', (0.0, 0.0, 0.25)),
+                                                'low': ('trimf', (0.0, 0.25, 0.5)),
+                                                'medium': ('trimf', (0.25, 0.5, 0.75)),
+                                                'high': ('trimf', (0.5, 0.75, 1.0)),
+                                                'very_high': ('trimf', (0.75, 1.0, 1.0))})
+
+# every rule ANDs its antecedents, as ({input: term}, output term). The battery and distance rules together
+# cover every input, so the output is never empty:
+SUITABILITY_RULES = [
+    ({'battery': 'low'}, 'very_low'),
+    ({'battery': 'medium', 'distance': 'near'}, 'high'),
+    ({'battery': 'medium', 'distance': 'mid'}, 'medium'),
+    ({'battery': 'medium', 'distance': 'far'}, 'low'),
+    ({'battery': 'high', 'distance': 'near'}, 'very_high'),
+    ({'battery': 'high', 'distance': 'mid'}, 'high'),
+    ({'battery': 'high', 'distance': 'far'}, 'medium'),
+    ({'load': 'high'}, 'low'),
+    ({'load': 'low', 'weight': 'good'}, 'high'),
+    ({'weight': 'poor', 'distance': 'far'}, 'very_low'),
+]
+
+class FuzzySystem:
+    # this is a Mamdani fuzzy inference system (min for AND and implication, max for aggregation, centroid
+    # defuzzification, as in skfuzzy.control), evaluated on whole arrays of inputs at once. Each sample is
+    # one row of every membership and activation array, so a fleet against many tasks is one call.
+    # - evaluate runs the full inference, in chunks of chunk_size samples to bound memory
+    # - with build_lookup, evaluate interpolates a table of precomputed outputs instead
+
+    def __init__(self, inputs = SUITABILITY_INPUTS, output = SUITABILITY_OUTPUT, rules = SUITABILITY_RULES,
+                 samples = 101, chunk_size = 65536):
+        self.inputs = inputs
+        self.output = output
+        self.rules = rules
+        self.chunk_size = chunk_size
+        self.lookup = None
+
+        # the output terms sampled on a fine universe, for the centroid integral:
+        name, low, high, terms = output
+        self.universe = np.linspace(low, high, samples)
+        self.output_terms = list(terms)
+        self.output_mfs = np.array([MEMBERSHIP_FUNCTIONS[kind](self.universe, *params) for kind, params in terms.values()])
+
+        # trapezoid rule weights on the evenly spaced universe, the spacing itself cancels out of the centroid:
+        self.trapezoid = np.ones(samples)
+        self.trapezoid[[0, -1]] = 0.5
+
+    def _memberships(self, name, values):
+        low, high, terms = self.inputs[name]
+        values = np.clip(values, low, high)
+        return {term: MEMBERSHIP_FUNCTIONS[kind](values, *params) for term, (kind, params) in terms.items()}
+
+    def _infer(self, values):
+        # values holds one flat array per input, all the same length:
+        memberships = {name: self._memberships(name, values[name]) for name in self.inputs}
+        n = len(next(iter(values.values())))
+
+        # activation of each output term is the max over the rules that conclude it:
+        cuts = np.zeros((len(self.output_terms), n))
+        for antecedents, consequent in self.rules:
+            activation = np.minimum.reduce([memberships[name][term] for name, term in antecedents.items()])
+            row = self.output_terms.index(consequent)
+            np.maximum(cuts[row], activation, out = cuts[row])
+
+        # clip each output term at its activation and aggregate, giving one output curve per sample:
+        aggregated = np.zeros((n, len(self.universe)))
+        for cut, mf in zip(cuts, self.output_mfs):
+            np.maximum(aggregated, np.minimum(cut[:, None], mf[None, :]), out = aggregated)
+        return (aggregated @ (self.trapezoid * self.universe)) / (aggregated @ self.trapezoid)
+
+    def evaluate(self, **inputs):
+        # this function returns the crisp output for every sample. Inputs are arrays which broadcast together,
+        # for example battery of shape (robots,) and distance of shape (tasks, robots):
+        arrays = np.broadcast_arrays(*[np.asarray(inputs[name], dtype = float) for name in self.inputs])
+        shape = arrays[0].shape
+        flat = [array.ravel() for array in arrays]
+
+        if self.lookup is not None:
+            return self._interpolate(flat).reshape(shape)
+
+        result = np.empty(arrays[0].size)
+        for start in range(0, len(result), self.chunk_size):
+            chunk = {name: values[start:start + self.chunk_size] for name, values in zip(self.inputs, flat)}
+            result[start:start + self.chunk_size] = self._infer(chunk)
+        return result.reshape(shape)
+
+    def build_lookup(self, points = 21):
+        # this function precomputes the output on a grid of points per input (an int, or a dict of ints per
+        # input) and switches evaluate to multilinear interpolation in that table:
+        self.lookup = None
+        if isinstance(points, int):
+            points = {name: points for name in self.inputs}
+
+        # the output bends sharply wherever a membership function does, so every breakpoint is a table point too:
+        axes = []
+        for name, (low, high, terms) in self.inputs.items():
+            breakpoints = [point for kind, params in terms.values() for point in params if low <= point <= high]
+            axes.append(np.union1d(np.linspace(low, high, points[name]), breakpoints))
+        mesh = np.meshgrid(*axes, indexing = 'ij')
+        table = self.evaluate(**{name: grid for name, grid in zip(self.inputs, mesh)})
+        self.lookup = (axes, table)
+
+    def clear_lookup(self):
+        self.lookup = None
+
+    def _interpolate(self, flat):
+        # multilinear interpolation in the lookup table, clamping inputs to the universes as inference does.
+        # The corners of each sample's cell are built up one input at a time, as (flat table offset, weight):
+        axes, table = self.lookup
+        strides = np.array(table.strides) // table.itemsize
+        corners = [(0, 1.0)]
+        for axis, values, stride in zip(axes, flat, strides):
+            values = np.clip(values, axis[0], axis[-1])
+            cell = np.clip(np.searchsorted(axis, values, side = 'right') - 1, 0, len(axis) - 2)
+            fraction = (values - axis[cell]) / (axis[cell + 1] - axis[cell])
+            offset = cell * stride
+            corners = [(base + offset, weight * (1.0 - fraction)) for base, weight in corners] + \
+                      [(base + offset + stride, weight * fraction) for base, weight in corners]
+
+        table = table.ravel()
+        return sum(weight * table[index] for index, weight in corners)
+
+def score_fleet(system, fleet, distances, max_distance = None):
+    # this function scores every robot of a fleet against every task in one call. distances holds the travel
+    # distance of each robot to each task, shape (tasks, robots), and is scaled by max_distance (the longest
+    # finite distance by default) so it fits the distance universe. Returns scores of shape (tasks, robots):
+    distances = np.atleast_2d(distances)
+    if max_distance is None:
+        finite = distances[np.isfinite(distances)]
+        max_distance = finite.max() if len(finite) and finite.max() > 0 else 1.0
+
+    scores = system.evaluate(battery = fleet.battery, load = fleet.load, weight = fleet.weight,
+                             distance = np.minimum(distances / max_distance, 1.0))
+
+    # a robot that can't reach a task at all is not suitable for it:
+    scores[~np.isfinite(distances)] = 0.0
+    return scores
+
+########## Reference Check ##########
+
+def skfuzzy_system(inputs = SUITABILITY_INPUTS, output = SUITABILITY_OUTPUT, rules = SUITABILITY_RULES, points = 121):
+    # this function builds the same system with skfuzzy.control, as the reference for the check below. Every
+    # breakpoint of the suitability system lands on a universe point with 121 points per universe, so skfuzzy's
+    # sampled membership functions are exact:
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+
+    def universe(low, high):
+        return np.linspace(low, high, points)
+
+    variables = {}
+    for name, (low, high, terms) in inputs.items():
+        variables[name] = ctrl.Antecedent(universe(low, high), name)
+        for term, (kind, params) in terms.items():
+            variables[name][term] = getattr(fuzz, kind)(variables[name].universe, list(params))
+
+    name, low, high, terms = output
+    consequent = ctrl.Consequent(universe(low, high), name)
+    for term, (kind, params) in terms.items():
+        consequent[term] = getattr(fuzz, kind)(consequent.universe, list(params))
+
+    control_rules = []
+    for antecedents, conclusion in rules:
+        terms = [variables[var][term] for var, term in antecedents.items()]
+        antecedent = terms[0]
+        for term in terms[1:]:
+            antecedent = antecedent & term
+        control_rules.append(ctrl.Rule(antecedent, consequent[conclusion]))
+
+    return ctrl.ControlSystemSimulation(ctrl.ControlSystem(control_rules)), name
+
+def check_against_skfuzzy(samples = 300, seed = 0):
+    # this function compares both modes of FuzzySystem with skfuzzy on random inputs, and returns the largest
+    # difference of each:
+    rng = np.random.default_rng(seed)
+    values = {name: rng.uniform(low, high, samples) for name, (low, high, terms) in SUITABILITY_INPUTS.items()}
+
+    simulation, output_name = skfuzzy_system()
+    expected = np.empty(samples)
+    for i in range(samples):
+        for name in values:
+            simulation.input[name] = values[name][i]
+        simulation.compute()
+        expected[i] = simulation.output[output_name]
+
+    system = FuzzySystem()
+    direct = np.abs(system.evaluate(**values) - expected).max()
+    system.build_lookup()
+    lookup = np.abs(system.evaluate(**values) - expected).max()
+    return direct, lookup
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    direct, lookup = check_against_skfuzzy()
+    print(f"direct: max difference {direct:.2e} (tolerance {FIS_TOLERANCE:.0e})")
+    print(f"lookup: max difference {lookup:.2e} (tolerance {LOOKUP_TOLERANCE:.0e})")
+    raise SystemExit(0 if direct <= FIS_TOLERANCE and lookup <= LOOKUP_TOLERANCE else 1)
@@ -0,0 +1,129 @@
+########## Import Libraries ##########
+
+import numpy as np
+from functools import cached_property
+from .clearance import spawnable_mask
+from .sites import sites_from_mask
+from . import instrument
+
+########## Define Functions and Classes #########
+
+# cell codes of the occupancy grid:
+UNKNOWN = 0
+FREE = 1
+OCCUPIED = 2
+
+def mask_points(mask):
+    # this function turns a mask indexed as mask[y, x] into an (N,2) array of x,y points, row by row
+    return np.flip(np.argwhere(mask), axis = 1)
+
+class GridMap:
+    # this is the occupancy grid of a map, which replaces the (N,2) body and border point arrays. It holds:
+    # - a grid of cell codes, one uint8 per pixel, or 2 bits per pixel when packed
+    # - the resolution, in metres per pixel
+    # - the origin, which is the metric x,y position of pixel (0,0)
+    # The grid is stored bottom row first, so grid[y, x] matches the x,y point frame used everywhere else.
+    # Point arrays are only built the first time a caller asks for them.
+
+    def __init__(self, grid, resolution = 0.05, origin = (0.0, 0.0), packed = False):
+        self.shape = grid.shape
+        self.resolution = resolution
+        self.origin = np.array(origin, dtype = float)
+        self.packed = packed
+
+        if packed:
+            # one bit plane per cell type, unknown is whatever is in neither:
+            self._free_bits = np.packbits(grid == FREE, axis = None)
+            self._occupied_bits = np.packbits(grid == OCCUPIED, axis = None)
+            self._grid = None
+        else:
+            self._grid = grid.astype(np.uint8, copy = False)
+
+    @classmethod
+    def from_image(cls, image, resolution = 0.05, origin = (0.0, 0.0), packed = False):
+        # white (>= 254) is free space, black (0) is the border and anything else is unknown, as in read_map:
+        image = np.flipud(image)
+        grid = np.full(image.shape, UNKNOWN, dtype = np.uint8)
+        grid[image >= 254] = FREE
+        grid[image == 0] = OCCUPIED
+        return cls(grid, resolution, origin, packed)
+
+    @classmethod
+    def read(cls, file_path, resolution = 0.05, origin = (0.0, 0.0), packed = False):
+        import cv2
+
+        image = cv2.imread(file_path, 0)
+        if image is None:
+            raise FileNotFoundError(file_path)
+        return cls.from_image(image, resolution, origin, packed)
+
+    @property
+    def grid(self):
+        if self._grid is not None:
+            return self._grid
+        size = self.shape[0] * self.shape[1]
+        grid = np.full(self.shape, UNKNOWN, dtype = np.uint8)
+        grid[np.unpackbits(self._free_bits, count = size).reshape(self.shape).view(bool)] = FREE
+        grid[np.unpackbits(self._occupied_bits, count = size).reshape(self.shape).view(bool)] = OCCUPIED
+        return grid
+
+    @property
+    def body_mask(self):
+        if self.packed:
+            return np.unpackbits(self._free_bits, count = self.shape[0] * self.shape[1]).reshape(self.shape).view(bool)
+        return self._grid == FREE
+
+    @property
+    def border_mask(self):
+        if self.packed:
+            return np.unpackbits(self._occupied_bits, count = self.shape[0] * self.shape[1]).reshape(self.shape).view(bool)
+        return self._grid == OCCUPIED
+
+    @cached_property
+    def body(self):
+        # white space as x,y points, identical to the body array of read_map:
+        return mask_points(self.body_mask)
+
+    @cached_property
+    def border(self):
+        # border as x,y points, identical to the border array of read_map:
+        return mask_points(self.border_mask)
+
+    @property
+    def nbytes(self):
+        # memory held by the grid itself, not counting any point arrays already built:
+        if self.packed:
+            return self._free_bits.nbytes + self._occupied_bits.nbytes
+        return self._grid.nbytes
+
+    def spawnable_mask(self, buffer, metric = "square"):
+        # spawnable space as a mask, straight from the grid without going through points:
+        return spawnable_mask(self.body_mask, self.border_mask, buffer, metric)
+
+    def to_world(self, points):
+        # pixel x,y points to metric x,y, measured at the pixel centres:
+        return self.origin + (np.asarray(points) + 0.5) * self.resolution
+
+    def to_pixel(self, xy):
+        # metric x,y to the pixel x,y containing it:
+        return np.floor((np.asarray(xy) - self.origin) / self.resolution).astype(np.int64)
+
+def preprocess_map(file_path, buffer, spacing, resolution = 0.05):
+    # this function runs the whole map pipeline and returns the grid map, the spawnable mask indexed [y, x] and
+    # the sites as x,y points. Body, border and spawnable points are left for the callers that need them:
+
+    # Step 1 - read map:
+    with instrument.span('read_map') as info:
+        grid_map = GridMap.read(file_path, resolution)
+        info['shape'] = grid_map.shape
+
+    # Step 2 - determine spawnable space, as a mask over the grid:
+    with instrument.span('spawnable_space', buffer = buffer) as info:
+        spawnable_grid = grid_map.spawnable_mask(buffer)
+        info['spawnable'] = int(spawnable_grid.sum()) if instrument.ENABLED else None
+
+    # Step 3 - determine spawnable sites:
+    with instrument.span('spawnable_sites', spacing = spacing) as info:
+        sites = sites_from_mask(spawnable_grid, spacing)
+        info['sites'] = len(sites)
+    return grid_map, spawnable_grid, sites
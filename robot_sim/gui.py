@@ -0,0 +1,297 @@
+########## Import Libraries ##########
+
+import argparse
+import matplotlib.pyplot as plt
+import matplotlib.backends.backend_tkagg as tkagg
+from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+import os
+import sys
+import tkinter as tk
+from tkinter import messagebox
+from .spawn import spawner
+from .fleet import RobotFleet
+from .site_index import SiteIndex
+from .gui_worker import BackgroundWorker
+from .mission_format import write_mission
+from .trajectory_log import TrajectoryWriter
+from .map_render import MapRenderer, Sidebar
+from . import instrument
+from .instrument import stage
+from .map import load_map
+
+########## Define Functions and Classes #########
+
+def get_position(window, w_frac, h_frac):
+    screen_width = window.winfo_screenwidth()   # grab screen width
+    screen_height = window.winfo_screenheight() # grab screen height
+
+    fig_width = int(screen_width * w_frac)      # width of figure
+    fig_height = int(screen_height * h_frac)    # height of figure
+
+    left = (screen_width - fig_width) / 2       # distance on left
+    top = (screen_height - fig_height) / 2      # distance on top
+
+    return fig_width, fig_height, left, top     # return values
+
+def fig_display(window, fig, width, height, placement, map_name, map_key, grid_map, spawnable, site_index, robots):
+
+    # set the name, size, and placement of the window:
+    task_location = None
+    trajectory = None      # the log of the simulation run playing, if any
+    playback = None        # the simulation run playing, if any
+    after_stop = None      # what to do once the run playing has stopped
+    fleet_version = 0      # counts changes of the fleet, so a run knows whether its fleet is still current
+    window.title('Interactive Map of the Environment')
+    window.geometry(f'{width}x{height}+{placement[0]}+{placement[1]}')
+
+    # place figure onto the window:
+    canvas = tkagg.FigureCanvasTkAgg(fig, master = window)
+
+    # create subplot, with the map drawn once and the robots and task drawn on top:
+    ax = fig.add_subplot(111)
+    renderer = MapRenderer(ax, canvas, grid_map.body_mask, grid_map.border_mask, spawnable)
+
+    def show_error(error):
+        # errors of background jobs are printed and shown, and the window carries on:
+        worker.report(error)
+        messagebox.showerror('Error', str(error), parent = window)
+
+    # the buttons' work runs in the background and its result is applied back on the main thread, so the
+    # window never blocks. A newer click of a button supersedes any older one still running:
+    worker = BackgroundWorker(window, on_error = show_error)
+    spawn_job = stage('spawn_job')(site_index.spawn_points)
+    generate_job = stage('generate_robots_job')(RobotFleet.generate)
+    save_job = stage('save_job')(write_mission)
+
+    @stage()
+    def spawn_task():
+        # the task keeps clear of every robot:
+        worker.submit('task', spawn_job, 1, separation,
+                      exclude = robots.position.copy(), on_done = show_task)
+
+    def show_task(points):
+        nonlocal task_location
+        task_location = [int(points[0][0]), int(points[0][1])]
+        renderer.set_task(task_location)
+
+    def terminate_figure_button():
+        # a frame that is being computed is waited for, so the trajectory log is closed after its last step:
+        worker.shutdown(wait = True)
+        if trajectory is not None:
+            trajectory.close()
+        if sys.stdout.isatty():
+            print('\033[2J\033[H', end = '')    # clear the terminal
+        print('Figure Terminated!')
+        instrument.report()
+        window.destroy()
+        os._exit(0)
+
+    @stage()
+    def save_button():
+
+        if task_location is None:
+            print("Wait for the task to spawn before saving")
+            return
+        print("Saving Mission Specifications")
+
+        # the fleet and task are saved as typed columns, and the map by its cache key, which holds the grid,
+        # spawnable mask and sites. The fleet is copied first, so the file is written from a snapshot:
+        worker.submit('save', save_job, 'saved_mission.rmis', robots.select(), [task_location],
+                      map_key, map_name = map_name, on_done = lambda result: print("Mission Saved!"))
+
+    @stage()
+    def randomize_position_button():
+        exclude = None if task_location is None else [task_location]
+        worker.submit('positions', spawn_job, len(robots), separation, exclude = exclude, on_done = move_robots)
+
+    def move_robots(positions):
+        nonlocal fleet_version
+        if len(positions) != len(robots):
+            return    # drawn for a fleet that has been regenerated since
+        robots.position[:] = positions
+        fleet_version += 1
+        stop_simulation()
+        update_display(robots, fleet_changed = False)
+        update_sidebar()
+
+    @stage()
+    def generate_random_robots_button():
+        worker.submit('robots', generate_job, site_index, separation = separation, on_done = show_robots)
+
+    def show_robots(new_robots):
+        nonlocal robots, fleet_version
+        robots = new_robots
+        fleet_version += 1
+        stop_simulation()
+        update_display(robots)
+        update_sidebar()
+
+    def simulate_button():
+        # plays the mission in this window, with one task per robot. The simulation moves a copy of the fleet,
+        # so the other buttons keep working on the real one, and a run already playing is stopped before the
+        # next starts. Setting up the simulation and every frame's steps run in the background, the window
+        # only moves the markers. Every step is recorded to a trajectory log, which python -m robot_sim.trajectory_viewer replays:
+        from .simulation import MissionSimulation
+        if playback is not None and not playback.done:
+            stop_simulation(then = simulate_button)
+            return
+
+        fleet, version = robots.select(), fleet_version
+        def setup():
+            return MissionSimulation(fleet, site_index.sites, spawnable, n_tasks = len(fleet), map_key = map_key)
+        worker.submit('simulation_setup', setup, on_done = lambda simulation: play(simulation, version))
+
+    def play(simulation, version):
+        nonlocal playback, trajectory
+        from .simulation import watch
+        if version != fleet_version:
+            return    # set up for a fleet that has changed since
+        writer = trajectory = TrajectoryWriter('saved_trajectory.rtrj', len(simulation.fleet), map_key = map_key,
+                                               map_name = map_name)
+        writer.record(simulation.fleet)
+
+        def on_frame(simulation):
+            writer.flush()
+            update_sidebar(simulation.fleet)
+
+        def on_stop(simulation):
+            # nothing of the run is running anymore: its log is closed, and the moved copy becomes the fleet,
+            # unless the fleet was changed during the run, which is then shown again instead:
+            nonlocal robots, trajectory, after_stop
+            writer.close()
+            trajectory = None
+            if version == fleet_version:
+                robots = simulation.fleet
+            update_display(robots)
+            update_sidebar()
+            then, after_stop = after_stop, None
+            if then is not None:
+                then()
+
+        playback = watch(simulation, window, renderer, steps_per_frame = 5, frames = 400, on_frame = on_frame,
+                         worker = worker, on_step = lambda simulation: writer.record(simulation.fleet), on_stop = on_stop)
+
+    def stop_simulation(then = None):
+        # stops the run playing, if any, and calls then() once it has stopped:
+        nonlocal after_stop
+        if playback is None or playback.done:
+            if then is not None:
+                then()
+            return
+        after_stop = then
+        playback.stop()
+
+    @stage()
+    def update_display(robots, fleet_changed = True):
+        # moving robots only blits their markers, a new fleet also redraws the legend:
+        if fleet_changed:
+            renderer.set_fleet(robots.position)
+        else:
+            renderer.move_robots(robots.position)
+
+    @stage(size = lambda result, fleet = None: {'len': len(robots if fleet is None else fleet)})
+    def update_sidebar(fleet = None):
+        # shows the fleet, or a simulation's copy of it while a run plays:
+        sidebar.update([(f"Robot ID: {robot.id}\n"
+                         f"Sensor: {robot.sensor}\n"
+                         f"Mode of Locomotion: {robot.locomotion}\n"
+                         f"Movement Weight: {robot.weight}\n"
+                         f"Position: {robot.position}\n"
+                         f"Battery: {robot.battery}\n"
+                         f"Load History: {robot.load}\n"
+                         f"Travelled Distance: {robot.travelled_distance}") for id, robot in (robots if fleet is None else fleet).items()])
+
+    # set the toolbar:
+    toolbar_frame = tk.Frame(window)
+    toolbar_frame.pack(side=tk.TOP, fill=tk.X)
+    toolbar = NavigationToolbar2Tk(canvas, toolbar_frame)
+    toolbar.update()
+
+    # create a frame for buttons:
+    button_frame = tk.Frame(window)
+    button_frame.pack(side = tk.TOP, anchor = "center", pady = 5)
+
+    # add a button to spawn tasks
+    spawn_button = tk.Button(button_frame, text="Spawn New Task", command=spawn_task)
+    spawn_button.pack(side=tk.LEFT, padx = 5)
+
+    # add a button to randomize robot locations
+    randomize_location_button = tk.Button(button_frame, text = "Randomize Robot Locations", command = randomize_position_button)
+    randomize_location_button.pack(side=tk.LEFT, padx = 5)
+
+    # add a button to regenerate robots:
+    randomize_robots_button = tk.Button(button_frame, text = "Regenerate Robots", command = generate_random_robots_button)
+    randomize_robots_button.pack(side = tk.LEFT, padx = 5)
+
+    # add a button to save mission:
+    save_mission_button = tk.Button(button_frame, text = "Save Mission", command  = save_button)
+    save_mission_button.pack(side = tk.LEFT, padx = 5)
+
+    # add a button to watch the mission play out:
+    run_simulation_button = tk.Button(button_frame, text = "Run Simulation", command = simulate_button)
+    run_simulation_button.pack(side = tk.LEFT, padx = 5)
+
+    # sidebar frame:
+    sidebar_frame = tk.Frame(window, width = 750, bg = "lightgrey")
+    sidebar_frame.pack(side = tk.LEFT, fill = tk.Y, padx = 10, pady = 5)
+    sidebar = Sidebar(sidebar_frame)
+    
+    # place the button:
+    button = tk.Button(window, text = 'Close Window', command = terminate_figure_button)
+    button.pack(side=tk.BOTTOM, pady=5)
+
+    # padding:
+    canvas.get_tk_widget().pack(side=tk.RIGHT, fill=tk.BOTH, expand = True)
+
+    # main gui function:
+    update_display(robots)
+    spawn_task()
+    update_sidebar()
+    window.mainloop()
+   
+#################     Main   #####################
+
+### define values: ###
+
+# set ROBOT_PROFILE=1 to time every stage and button, with a summary printed when the window closes, and
+# ROBOT_TRACE to a file path to also save the timeline as trace events
+
+w_frac = 0.60
+h_frac = 0.80
+separation = 10  # smallest distance between spawned robots and the task, in pixels
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Open the interactive map, with a random fleet and task spawned on it.")
+    parser.add_argument('map', nargs = '?', default = None, help = "map file name in the maps folder, or a path to a map png; asked for if not given")
+    parser.add_argument('--maps-dir', default = None, help = "folder to find map names in, the maps folder next to the package by default")
+    args = parser.parse_args(argv)
+
+    ### function calls to set up map: ###
+
+    # Steps 1 to 3:
+    map_name = args.map or input("Please enter name of map with file extension: ")
+    map_key, grid_map, spawnable, sites = load_map(map_name, maps_dir = args.maps_dir)
+
+    # Step 4 - randomly spawn a task:
+    task = (spawner(sites))
+
+    ### spawn robots: ###
+
+    site_index = SiteIndex(sites, cell_size = separation)
+    with instrument.span('generate_robots') as info:
+        robots = RobotFleet.generate(site_index, separation = separation)
+        info['len'] = len(robots)
+
+    ### visualization through GUI: ###
+
+    # get size of figure from the screen the window opens on, and generate figure:
+    window = tk.Tk()
+    fig_width, fig_height, left, top = get_position(window, w_frac, h_frac)
+    fig = plt.figure()
+    fig.set_size_inches(fig_width / 100, fig_height / 100)
+
+    # call gui function:
+    fig_display(window, fig, fig_width, fig_height, (int(left), int(top)), map_name, map_key, grid_map, spawnable, site_index, robots)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+########## Import Libraries ##########
+
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+########## Define Functions and Classes #########
+
+class BackgroundWorker:
+    # this runs GUI work off the Tk main thread. Jobs go to an executor (a thread pool by default), finished
+    # jobs put their result on a thread-safe queue, and the window polls that queue every poll_ms milliseconds
+    # with after(), calling each job's on_done on the main thread, the only one allowed to touch Tk and the
+    # figure. Jobs are grouped by name: submitting a job supersedes every earlier job of the same name, which
+    # is cancelled if it hasn't started, and has its result dropped if it has. Repeated clicks on one button
+    # therefore only ever apply the last click. A failed job calls its on_error, or the worker's, which
+    # prints the traceback by default; either way the window keeps polling.
+
+    def __init__(self, window, poll_ms = 30, executor = None, on_error = None):
+        self.window = window
+        self.on_error = on_error or self.report    # for jobs submitted without their own on_error
+        self.poll_ms = poll_ms
+        self.executor = executor or ThreadPoolExecutor(max_workers = 2, thread_name_prefix = 'gui-worker')
+        self.results = queue.Queue()
+        self.latest = {}         # name: generation of the newest job of that name
+        self.pending = {}        # name: future of the newest job of that name
+        self.lock = threading.Lock()
+        self.closed = False
+        self.window.after(self.poll_ms, self._poll)
+
+    def submit(self, name, function, *args, on_done = None, on_error = None, **kwargs):
+        # runs function(*args, **kwargs) in the background, then on_done(result) or on_error(exception) on
+        # the main thread, unless a newer job of the same name was submitted in the meantime:
+        with self.lock:
+            generation = self.latest.get(name, 0) + 1
+            self.latest[name] = generation
+            previous = self.pending.get(name)
+            if previous is not None:
+                previous.cancel()
+            future = self.executor.submit(function, *args, **kwargs)
+            self.pending[name] = future
+        future.add_done_callback(lambda future: self._finished(name, generation, future, on_done, on_error))
+        return future
+
+    def busy(self, name):
+        # whether a job of this name is still queued or running:
+        future = self.pending.get(name)
+        return future is not None and not future.done()
+
+    def _finished(self, name, generation, future, on_done, on_error):
+        # runs on the worker thread, so it only hands the outcome over to the queue:
+        if future.cancelled():
+            return
+        error = future.exception()
+        self.results.put((name, generation, None if error else future.result(), error, on_done, on_error))
+
+    def _poll(self):
+        # runs on the main thread, applying every finished job that is still the newest of its name. The next
+        # poll is always scheduled, so one failing job or callback can't stop the results of later ones:
+        try:
+            while True:
+                try:
+                    name, generation, result, error, on_done, on_error = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                if generation != self.latest.get(name):
+                    continue
+                try:
+                    if error is not None:
+                        (on_error or self.on_error)(error)
+                    elif on_done is not None:
+                        on_done(result)
+                except Exception as callback_error:
+                    self.on_error(callback_error)
+        finally:
+            if not self.closed:
+                self.window.after(self.poll_ms, self._poll)
+
+    def report(self, error):
+        # the default on_error, which prints the traceback and lets the window carry on:
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+    def shutdown(self, wait = False):
+        # cancels everything queued and stops polling, waiting for the jobs already running only if wait:
+        self.closed = True
+        self.executor.shutdown(wait = wait, cancel_futures = True)
@@ -0,0 +1,151 @@
+########## Import Libraries ##########
+
+import numpy as np
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+########## Define Functions and Classes #########
+
+# Instrumentation is off unless the ROBOT_PROFILE environment variable is set, or enable() is called. While it
+# is off, a wrapped function costs one flag check on top of the call, and a span one flag check and an empty
+# with block. While it is on, every call records its wall time and the size of what it worked on:
+# - stats holds, per stage, the number of calls, the total, shortest and longest time, and the last sizes
+# - events holds the last max_events calls in order, for the trace event export
+ENABLED = bool(os.environ.get('ROBOT_PROFILE'))
+
+class Recorder:
+
+    def __init__(self, max_events = 100000):
+        self.stats = {}
+        self.events = deque(maxlen = max_events)
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def add(self, name, start, seconds, info):
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = {'calls': 0, 'total': 0.0, 'min': np.inf, 'max': 0.0, 'info': {}}
+            stat['calls'] += 1
+            stat['total'] += seconds
+            stat['min'] = min(stat['min'], seconds)
+            stat['max'] = max(stat['max'], seconds)
+            stat['info'] = info
+            self.events.append((name, start - self.origin, seconds, threading.get_ident(), info))
+
+recorder = Recorder()
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+def reset():
+    global recorder
+    recorder = Recorder(recorder.events.maxlen)
+
+def describe(value):
+    # this function gives the size of a stage's input or result: shape and bytes for arrays, length for
+    # anything else with one, and the same per item for tuples:
+    if isinstance(value, np.ndarray):
+        return {'shape': list(value.shape), 'nbytes': int(value.nbytes)}
+    if isinstance(value, tuple):
+        return {'items': [describe(item) for item in value]}
+    if hasattr(value, '__len__'):
+        return {'len': len(value)}
+    return {}
+
+def stage(name = None, size = None):
+    # this decorator records every call of a function under name (the function's name by default). size is
+    # an optional function of (result, *args, **kwargs) giving the sizes to record; by default the result is
+    # described, or the first argument when the function returns nothing:
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            if size is not None:
+                info = size(result, *args, **kwargs)
+            else:
+                info = describe(result if result is not None or not args else args[0])
+            recorder.add(label, start, seconds, info)
+            return result
+        return wrapper
+    return decorator
+
+@contextmanager
+def span(name, **info):
+    # this context manager records the time spent in its with block, with any sizes given as keywords:
+    if not ENABLED:
+        yield info
+        return
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        recorder.add(name, start, time.perf_counter() - start, info)
+
+########## Reports ##########
+
+def summary():
+    # this function returns the recorded stages as a table, slowest total first:
+    lines = [f"{'stage':<32} {'calls':>7} {'total ms':>11} {'mean ms':>10} {'min ms':>10} {'max ms':>10}  last size"]
+    for name, stat in sorted(recorder.stats.items(), key = lambda item: -item[1]['total']):
+        lines.append(f"{name:<32} {stat['calls']:>7} {stat['total'] * 1000:>11.2f} "
+                     f"{stat['total'] / stat['calls'] * 1000:>10.3f} {stat['min'] * 1000:>10.3f} "
+                     f"{stat['max'] * 1000:>10.3f}  {json.dumps(stat['info'])}")
+    return '\n'.join(lines)
+
+def dump(file_path):
+    # this function writes the per stage statistics as JSON:
+    with open(file_path, 'w') as file:
+        json.dump(recorder.stats, file, indent = 2)
+
+def report():
+    # this function prints the summary, and writes the trace to the path in ROBOT_TRACE if that is set. It is
+    # meant for scripts to call on exit:
+    if not recorder.stats:
+        return
+    print(summary())
+    if os.environ.get('ROBOT_TRACE'):
+        export_trace(os.environ['ROBOT_TRACE'])
+
+def export_trace(file_path):
+    # this function writes the recorded calls in the Chrome trace event format, which chrome://tracing and
+    # Perfetto open as a timeline with one row per thread:
+    pid = os.getpid()
+    events = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': seconds * 1e6, 'pid': pid, 'tid': tid, 'args': info}
+              for name, start, seconds, tid, info in recorder.events]
+    with open(file_path, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+@contextmanager
+def profile(file_path = None, sort = 'cumulative', limit = 30):
+    # this context manager runs cProfile over its with block, and writes the stats to file_path for
+    # snakeviz or pstats, or prints the top limit functions when no path is given:
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if file_path is not None:
+            profiler.dump_stats(file_path)
+        else:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
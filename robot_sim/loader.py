@@ -0,0 +1,38 @@
+########## Import Libraries ##########
+
+from .map_cache import MapCache
+from .mission_format import read_mission, fleet_from_columns
+
+########## Define Functions ##########
+
+def load_robots(file_path = 'saved_mission.rmis'):
+    # the mission file holds the fleet and tasks as columns, and names the map by its cache key. The first task
+    # is returned, or None for a mission saved without any:
+    header, columns = read_mission(file_path)
+    fleet = fleet_from_columns(columns)
+    tasks = columns['task_locations']
+    task_location = tasks[0] if len(tasks) else None
+
+    ## Open the map variables from the cache, if the map has been preprocessed on this machine:
+    cached = MapCache().load_map(header['map_key']) if header['map_key'] else None
+    if cached is None:
+        print(f"Map {header['map_key']} is not in the map cache, only the fleet was loaded")
+        grid_map = spawnable = sites = None
+    else:
+        grid_map, spawnable, sites = cached
+
+    ## Display the robots:
+    table = [('Robot ID', 'Sensor Type', 'Mode of Locomotion', 'Movement Weight', 'Battery Level',
+              'Load History', 'Travelled Distance', 'Current Position')]
+    table += [(str(robot.id), robot.sensor, robot.locomotion, str(robot.weight), str(robot.battery),
+               str(robot.load), str(robot.travelled_distance), str(robot.position)) for robot in fleet.values()]
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        print('  '.join(cell.center(width) for cell, width in zip(row, widths)))
+    return grid_map, spawnable, sites, task_location
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    # load in the robots for the mission:
+    grid_map, spawnable, sites, task_location = load_robots()
@@ -0,0 +1,82 @@
+########## Import Libraries ##########
+
+import numpy as np
+import os
+from .clearance import spawnable_points
+from .sites import sites_from_points
+from .map_cache import MapCache
+from .grid_map import GridMap, preprocess_map
+from . import instrument
+from .instrument import stage
+
+# The map functions below import without matplotlib, tkinter or OpenCV, so scripts can use them headless.
+# Maps are found by path, or by file name in a maps folder: the one given, or else the maps folder next to the
+# package, whatever the current working directory is.
+
+### define values: ###
+
+buffer = 6  # spacing used to scale back spawnable space from the border
+site_spacing = 4  # spacing between spawnable sites
+resolution = 0.05
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'maps')
+
+########## Define Functions and Classes #########
+
+def generate_image(width, height, maps_dir = None):
+    # generate a blank png for use in mapping:
+    import cv2
+    blank_image = np.ones((height, width, 3), dtype=np.uint8) * 205
+
+    # write the image to variable that will return a flag for true or false
+    a = cv2.imwrite(os.path.join(maps_dir or MAPS_DIR, 'blank_image.png'), blank_image)
+
+    # verify that the image was actually created:
+    if a == True:
+        print('Image saved successfully')
+    else:
+        print('Image saving failed')
+
+def map_path(map_name, maps_dir = None):
+    # this function finds a given map, either as a path to the file or by its name in the maps folder:
+    map_str = str(map_name)
+    if os.path.isfile(map_str):
+        return os.path.abspath(map_str)
+
+    file_path = os.path.join(maps_dir or MAPS_DIR, map_str)
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"No map {map_str} in {os.path.abspath(maps_dir or MAPS_DIR)}")
+    return os.path.abspath(file_path)
+
+@stage()
+def read_map(map_name, maps_dir = None):
+    # this function reads a given map into an occupancy grid, which holds the white space and the border. The
+    # body and border point arrays are available from it as grid_map.body and grid_map.border:
+    return GridMap.read(map_path(map_name, maps_dir), resolution)
+
+@stage()
+def spawnable_space(body,border,buffer):
+    # this function determines spawnable space using the white space and the border. A point is spawnable
+    # when no border point lies within the (2*buffer+1) square window around it, which is computed as one
+    # dilation of the border mask rather than a window lookup per pixel:
+    return spawnable_points(body, border, buffer)
+
+@stage()
+def spawnable_sites(spawnable,buffer):
+        # The function call generates a grid of evenly spaced points between the minimum and maxiumum range of both the x and y data,
+        # and this grid is then compared against the set of all spawnable area and the points that coincide within both are kept. 
+        # This allows for an array of all possible evenly spaced points, which are separated by 20cm in both the x and y directions.
+        # The grid is taken as a strided slice of the spawnable mask, so no grid or point set is built in Python.
+        return sites_from_points(spawnable, buffer)
+
+def load_map(map_name, buffer = buffer, site_spacing = site_spacing, resolution = resolution, map_cache = None, maps_dir = None):
+    # this function runs steps 1 to 3 for a map, found as map_path finds it, and returns its cache key with the
+    # grid map, the spawnable mask and the sites. The steps only run the first time a map is seen with these
+    # settings, after that they are memory-mapped from the cache:
+    map_file = map_path(map_name, maps_dir)
+    map_cache = map_cache or MapCache()
+    map_key = map_cache.key(map_file, buffer, site_spacing)
+    with instrument.span('preprocess', map = map_name):
+        grid_map, spawnable, sites = map_cache.preprocess(map_file, buffer, site_spacing,
+                                                          lambda: preprocess_map(map_file, buffer, site_spacing, resolution),
+                                                          resolution = resolution)
+    return map_key, grid_map, spawnable, sites
@@ -0,0 +1,159 @@
+########## Import Libraries ##########
+
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from .grid_map import GridMap
+
+########## Define Functions and Classes #########
+
+# Version 1 entries held body, border and spawnable as point arrays. Their keys end in -v1, so they are never
+# hit again and eviction drops them by age:
+CACHE_VERSION = 2
+CACHE_ARRAYS = ("grid", "spawnable", "sites")
+STAGING_PREFIX = '.staging-'
+STAGING_GRACE = 3600    # seconds a staging directory is given to be renamed into place before eviction removes it
+
+def map_hash(map_path):
+    # this function returns the sha256 of the raw png bytes, so a renamed map still hits and an edited one misses
+    digest = hashlib.sha256()
+    with open(map_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class MapCache:
+    # this is the on-disk cache of preprocessed maps. Each entry is a directory named after the map hash, the
+    # buffer and the site spacing, holding one .npy file per array so it can be memory-mapped on load, and
+    # a meta.json describing it. The arrays are the occupancy grid as uint8 cell codes and the spawnable mask
+    # as bool, both indexed [y, x] like GridMap, and the sites as int32 x,y points. Entries are:
+    # - written to a temporary directory first and renamed into place, so a crashed run never leaves half an entry
+    # - touched on every hit, so eviction by age and size drops the least recently used entries first
+
+    def __init__(self, root = None, max_bytes = 2 * 1024**3, max_age = 30 * 24 * 3600):
+        self.root = root or os.path.join(os.getcwd(), 'map_cache')
+        self.max_bytes = max_bytes      # total size allowed on disk, in bytes
+        self.max_age = max_age          # time an entry may go unused before eviction, in seconds
+        os.makedirs(self.root, exist_ok = True)
+
+    def key(self, map_path, buffer, spacing):
+        # the key is the content hash of the map plus every parameter that changes the result:
+        return f"{map_hash(map_path)}-b{buffer}-s{spacing}-v{CACHE_VERSION}"
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def load(self, key, mmap_mode = 'r'):
+        # returns the cached arrays as a dictionary, or None on a miss:
+        path = self.entry_path(key)
+        if not os.path.isfile(os.path.join(path, 'meta.json')):
+            return None
+
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode = mmap_mode) for name in CACHE_ARRAYS}
+        os.utime(path)
+        return arrays
+
+    def load_map(self, key, mmap_mode = 'r', resolution = None, origin = None):
+        # returns the cached map as a GridMap over the memory-mapped grid, with its spawnable mask and sites,
+        # or None on a miss. None of the arrays depend on the resolution or origin, so the GridMap takes the
+        # ones given, and the ones the entry was built with otherwise:
+        arrays = self.load(key, mmap_mode)
+        if arrays is None:
+            return None
+        with open(os.path.join(self.entry_path(key), 'meta.json')) as file:
+            meta = json.load(file)
+        resolution = meta['resolution'] if resolution is None else resolution
+        origin = meta['origin'] if origin is None else origin
+        return GridMap(arrays['grid'], resolution, origin), arrays['spawnable'], arrays['sites']
+
+    def store(self, key, grid_map, spawnable, sites, **meta):
+        # the grid and the mask cost one byte per pixel whatever is on the map, and the sites are stored as
+        # int32, half the size of the int64 arrays the pipeline produces:
+        staging = tempfile.mkdtemp(prefix = STAGING_PREFIX, dir = self.root)
+        sites = np.asarray(sites).reshape(-1, 2).astype(np.int32)
+        np.save(os.path.join(staging, 'grid.npy'), grid_map.grid)
+        np.save(os.path.join(staging, 'spawnable.npy'), np.asarray(spawnable, dtype = bool))
+        np.save(os.path.join(staging, 'sites.npy'), sites)
+
+        meta.update(version = CACHE_VERSION, created = time.time(), shape = list(grid_map.shape),
+                    resolution = grid_map.resolution, origin = grid_map.origin.tolist(), sites = len(sites))
+        with open(os.path.join(staging, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+
+        # another process may have stored the same entry in the meantime, in which case keep theirs:
+        try:
+            os.rename(staging, self.entry_path(key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors = True)
+
+        self.evict(keep = key)
+        return self.load_map(key)
+
+    def preprocess(self, map_path, buffer, spacing, build, resolution = None, origin = None):
+        # this function returns the grid map, spawnable mask and sites of a map, calling build() only on a
+        # miss. build must return the three in that order, as preprocess_map does. The GridMap takes the
+        # resolution and origin given, whatever the entry was first built with:
+        key = self.key(map_path, buffer, spacing)
+        cached = self.load_map(key, resolution = resolution, origin = origin)
+        if cached is None:
+            self.store(key, *build(), map_name = os.path.basename(map_path), buffer = buffer, spacing = spacing)
+            cached = self.load_map(key, resolution = resolution, origin = origin)
+        return cached
+
+    def entries(self):
+        # returns (key, size in bytes, last used time) for every complete entry:
+        found = []
+        for key in os.listdir(self.root):
+            path = self.entry_path(key)
+            if key.startswith('.') or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            found.append((key, size, os.path.getmtime(path)))
+        return found
+
+    def invalidate(self, map_path = None, key = None):
+        # removes one entry by key, every entry of one map, or the whole cache when called with no arguments:
+        if key is not None:
+            targets = [key]
+        elif map_path is not None:
+            prefix = map_hash(map_path) + '-'
+            targets = [entry[0] for entry in self.entries() if entry[0].startswith(prefix)]
+        else:
+            targets = [entry[0] for entry in self.entries()]
+
+        for target in targets:
+            shutil.rmtree(self.entry_path(target), ignore_errors = True)
+        return len(targets)
+
+    def remove_staging(self, grace = STAGING_GRACE):
+        # removes the staging directories left behind by runs that crashed between writing and renaming an
+        # entry. A store in progress keeps touching its directory, so only those untouched for grace seconds go:
+        removed = 0
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(STAGING_PREFIX) and entry.is_dir() and time.time() - entry.stat().st_mtime > grace:
+                shutil.rmtree(entry.path, ignore_errors = True)
+                removed += 1
+        return removed
+
+    def evict(self, keep = None):
+        # drops leftover staging directories, then entries older than max_age, then the least recently used
+        # ones until under max_bytes. The entry named by keep is never dropped, so a fresh store always
+        # survives its own eviction pass:
+        self.remove_staging()
+        now = time.time()
+        found = self.entries()
+        total = sum(entry[1] for entry in found)
+        entries = sorted((entry for entry in found if entry[0] != keep), key = lambda entry: entry[2])
+        removed = 0
+
+        for key, size, used in entries:
+            if now - used <= self.max_age and total <= self.max_bytes:
+                break
+            shutil.rmtree(self.entry_path(key), ignore_errors = True)
+            total -= size
+            removed += 1
+        return removed
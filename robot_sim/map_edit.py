@@ -0,0 +1,208 @@
+########## Import Libraries ##########
+
+import numpy as np
+import os
+from .clearance import spawnable_mask
+from .grid_map import GridMap, UNKNOWN, FREE, OCCUPIED
+from .sites import LATTICES, lattice_grids, first_on_grid, grid_hits, sites_from_mask
+from . import instrument
+
+########## Define Functions and Classes #########
+
+def changed_region(old, new):
+    # this function returns the bounding rectangle (y0, y1, x0, x1) of the cells that differ between two
+    # grids of the same shape, or None if they are the same:
+    if old.shape != new.shape:
+        raise ValueError(f"Grid shape changed from {old.shape} to {new.shape}, the map needs a full rebuild")
+    changed = old != new
+    rows = np.flatnonzero(changed.any(axis = 1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(changed[rows[0]:rows[-1] + 1].any(axis = 0))
+    return rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+def grow(region, margin, shape):
+    # the region grown by margin on every side, clipped to the grid:
+    y0, y1, x0, x1 = region
+    return max(0, y0 - margin), min(shape[0], y1 + margin), max(0, x0 - margin), min(shape[1], x1 + margin)
+
+class IncrementalMap:
+    # this is a map whose spawnable mask and sites are kept up to date as the map is edited, by recomputing
+    # only around the edit. A changed cell can only change the clearance of pixels within buffer of it, so:
+    # - the spawnable mask is recomputed in the changed rectangle grown by buffer, from a window grown by
+    #   buffer once more, which holds every border pixel that can reach it
+    # - the sites in that rectangle are replaced, unless the bounding box of the spawnable mask moved, which
+    #   moves the whole lattice and regrids every site
+    # - with a field cache, the navigation graph of map_key is updated and only the distance fields the
+    #   edit can change are dropped
+    # Row and column counts of the spawnable mask are kept so its bounding box never needs a full scan.
+
+    def __init__(self, grid_map, buffer, spacing, offset = (0,0), lattice = "square", metric = "square",
+                 field_cache = None, map_key = None):
+        if lattice not in LATTICES:
+            raise ValueError(f"Unknown site lattice: {lattice}")
+        self.grid = grid_map.grid.copy()
+        self.resolution = grid_map.resolution
+        self.origin = grid_map.origin
+        self.buffer = buffer
+        self.spacing = spacing
+        self.offset = offset
+        self.lattice = lattice
+        self.metric = metric
+        self.field_cache = field_cache
+        self.map_key = map_key
+
+        self.spawnable = spawnable_mask(self.grid == FREE, self.grid == OCCUPIED, buffer, metric)
+        self.row_counts = self.spawnable.sum(axis = 1)
+        self.col_counts = self.spawnable.sum(axis = 0)
+        self.bounds = self._bounds()
+        self.sites = sites_from_mask(self.spawnable, spacing, offset, lattice)
+        self.site_keys = self._site_keys(self.sites)
+
+    @classmethod
+    def read(cls, file_path, buffer, spacing, resolution = 0.05, **options):
+        return cls(GridMap.read(file_path, resolution), buffer, spacing, **options)
+
+    def _bounds(self):
+        cols = np.flatnonzero(self.col_counts)
+        rows = np.flatnonzero(self.row_counts)
+        if len(cols) == 0:
+            return None
+        return cols[0], cols[-1], rows[0], rows[-1]
+
+    def _site_keys(self, sites):
+        # sites are ordered column by column, which is the order of these keys:
+        return sites[:,0] * self.grid.shape[0] + sites[:,1]
+
+    ### edits: ###
+
+    def update_image(self, image):
+        # this function takes the whole edited map image, as read by cv2, and updates what it changed:
+        return self.update_grid(GridMap.from_image(image).grid)
+
+    def update_grid(self, grid):
+        # this function takes the whole edited grid, and updates what changed. Returns the changed rectangle:
+        region = changed_region(self.grid, grid)
+        if region is not None:
+            y0, y1, x0, x1 = region
+            self.grid[y0:y1, x0:x1] = grid[y0:y1, x0:x1]
+            self._recompute(region)
+        return region
+
+    def edit(self, region, cells):
+        # this function writes cell codes into a rectangle (y0, y1, x0, x1) of the grid, for example
+        # OCCUPIED to close a door, and updates what it changed:
+        y0, y1, x0, x1 = region
+        old = self.grid[y0:y1, x0:x1].copy()
+        self.grid[y0:y1, x0:x1] = cells
+        changed = changed_region(old, self.grid[y0:y1, x0:x1])
+        if changed is None:
+            return None
+        changed = (y0 + changed[0], y0 + changed[1], x0 + changed[2], x0 + changed[3])
+        self._recompute(changed)
+        return changed
+
+    ### recomputation: ###
+
+    def _recompute(self, region):
+        with instrument.span('incremental_update', region = [int(value) for value in region]) as info:
+            shape = self.grid.shape
+            dirty = grow(region, self.buffer, shape)
+            window = grow(dirty, self.buffer, shape)
+
+            # Step 2 - spawnable space in the dirty rectangle, from its window:
+            y0, y1, x0, x1 = dirty
+            wy0, wy1, wx0, wx1 = window
+            cells = self.grid[wy0:wy1, wx0:wx1]
+            fresh = spawnable_mask(cells == FREE, cells == OCCUPIED, self.buffer, self.metric)[y0 - wy0:y1 - wy0, x0 - wx0:x1 - wx0]
+            old = self.spawnable[y0:y1, x0:x1].copy()
+            self.spawnable[y0:y1, x0:x1] = fresh
+            self.row_counts[y0:y1] += fresh.sum(axis = 1) - old.sum(axis = 1)
+            self.col_counts[x0:x1] += fresh.sum(axis = 0) - old.sum(axis = 0)
+
+            # Step 3 - spawnable sites, in the dirty rectangle unless the lattice moved:
+            bounds = self._bounds()
+            if bounds != self.bounds or bounds is None:
+                self.bounds = bounds
+                self.sites = sites_from_mask(self.spawnable, self.spacing, self.offset, self.lattice)
+                self.site_keys = self._site_keys(self.sites)
+                info['regrid'] = True
+            else:
+                self._replace_sites(dirty)
+
+            if self.field_cache is not None and self.map_key in self.field_cache.graphs:
+                info['fields_dropped'] = self.field_cache.update_map(self.map_key, dirty, old, fresh)
+
+    def _replace_sites(self, dirty):
+        # this function swaps the sites inside the dirty rectangle for the lattice points now spawnable there.
+        # Sites are ordered column by column, so the dirty columns are one slice of the array, and only that
+        # slice is rebuilt. A new array is made each time, so callers holding the old one keep a consistent copy:
+        y0, y1, x0, x1 = dirty
+        height = self.grid.shape[0]
+        a, b = np.searchsorted(self.site_keys, (x0 * height, x1 * height))
+        block = self.sites[a:b]
+        block = block[(block[:,1] < y0) | (block[:,1] >= y1)]
+
+        xmax, ymax = self.bounds[1], self.bounds[3]
+        hits = [block]
+        for gx0, gy0, x_step, y_step in lattice_grids(self.bounds, self.spacing, self.offset, self.lattice):
+            tx0, ty0 = first_on_grid(x0, gx0, x_step), first_on_grid(y0, gy0, y_step)
+            hits.append(grid_hits(self.spawnable, tx0, ty0, x_step, y_step, min(xmax, x1 - 1), min(ymax, y1 - 1)))
+        block = np.vstack(hits).astype(np.int64)
+        block = block[np.lexsort((block[:,1], block[:,0]))]
+
+        self.sites = np.concatenate((self.sites[:a], block, self.sites[b:]))
+        self.site_keys = np.concatenate((self.site_keys[:a], self._site_keys(block), self.site_keys[b:]))
+
+########## Reference Check ##########
+
+def check_edits(edits = 30, fields = 4, buffer = 6, spacing = 4, seed = 0):
+    # this function makes random rectangle edits to every map in maps/, half through edit and half through
+    # update_grid, and after each one compares the spawnable mask and sites of an IncrementalMap with a full
+    # recompute of the edited grid, and every distance field the cache kept with one computed from scratch:
+    from .distance_field import FieldCache, NavigationGraph
+
+    from .map import MAPS_DIR
+    rng = np.random.default_rng(seed)
+    failures = 0
+
+    for map_name in sorted(os.listdir(MAPS_DIR)):
+        if not map_name.endswith('.png'):
+            continue
+        field_cache = FieldCache(max_fields = fields)
+        edited = IncrementalMap.read(os.path.join(MAPS_DIR, map_name), buffer, spacing, field_cache = field_cache, map_key = map_name)
+        field_cache.add_map(map_name, edited.spawnable)
+        height, width = edited.grid.shape
+        mismatches = 0
+
+        for step in range(edits):
+            # keep a few fields cached, so the edit has some to carry over or drop:
+            while len(edited.sites) and len(field_cache.fields) < fields:
+                field_cache.field(map_name, edited.sites[rng.integers(len(edited.sites))])
+
+            h, w = rng.integers(1, max(2, min(height, width) // 8), size = 2)
+            y0, x0 = rng.integers(0, height - h + 1), rng.integers(0, width - w + 1)
+            cells = rng.choice((UNKNOWN, FREE, OCCUPIED))
+            if step % 2:
+                grid = edited.grid.copy()
+                grid[y0:y0 + h, x0:x0 + w] = cells
+                edited.update_grid(grid)
+            else:
+                edited.edit((y0, y0 + h, x0, x0 + w), cells)
+
+            expected = spawnable_mask(edited.grid == FREE, edited.grid == OCCUPIED, buffer)
+            ok = np.array_equal(edited.spawnable, expected) and np.array_equal(edited.sites, sites_from_mask(expected, spacing))
+            graph = NavigationGraph(expected)
+            for field in field_cache.fields.values():
+                ok &= np.allclose(field.grid, graph.field(field.source).grid)
+            mismatches += not ok
+
+        failures += mismatches
+        print(f"{map_name:<20} {edits} edits {'OK' if mismatches == 0 else f'{mismatches} MISMATCHES'}")
+
+    return failures
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    raise SystemExit(1 if check_edits() else 0)
@@ -0,0 +1,174 @@
+########## Import Libraries ##########
+
+import numpy as np
+from .grid_map import GridMap, UNKNOWN, FREE, OCCUPIED
+
+########## Define Functions and Classes #########
+
+# the cell itself, then its 8 neighbours nearest first, as x,y offsets for snapping to a graph node:
+SNAP_OFFSETS = ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1))
+
+def reduce_blocks(mask, factor, fill, reduce):
+    # this function combines every factor x factor block of a boolean mask into one cell, with reduce being
+    # np.logical_and (all) or np.logical_or (any), after padding the mask up to a multiple of factor with fill.
+    # It works on the factor*factor strided views of the mask, which is much faster than reducing over
+    # small block axes:
+    height, width = mask.shape
+    if height % factor or width % factor:
+        mask = np.pad(mask, ((0, -height % factor), (0, -width % factor)), constant_values = fill)
+    coarse = mask[::factor, ::factor].copy()
+    for dy in range(factor):
+        for dx in range(factor):
+            if dy or dx:
+                reduce(coarse, mask[dy::factor, dx::factor], out = coarse)
+    return coarse
+
+def downsample_grid(grid, factor = 2):
+    # this function downsamples an occupancy grid conservatively, so no obstacle is ever lost: a coarse cell is
+    # occupied if any of its fine cells is, free only if all of them are, and unknown otherwise. Cells past the
+    # edge of the map count as unknown:
+    free = reduce_blocks(grid == FREE, factor, False, np.logical_and)
+    occupied = reduce_blocks(grid == OCCUPIED, factor, False, np.logical_or)
+    coarse = np.full(free.shape, UNKNOWN, dtype = np.uint8)
+    coarse[free] = FREE
+    coarse[occupied] = OCCUPIED
+    return coarse
+
+class MapPyramid:
+    # this is a stack of ever coarser copies of a map, level 0 being the map itself and every level after it
+    # factor times coarser, down to min_size cells on the short side. Each level is a GridMap with its own
+    # resolution and the map's origin, so metric coordinates mean the same place on every level. With a
+    # spawnable mask, every level also keeps two masks of it:
+    # - all_spawnable, the coarse cells whose fine pixels are all spawnable
+    # - any_spawnable, the coarse cells with at least one spawnable fine pixel
+    # so a coarse cell answers "spawnable?" for certain unless it is mixed, and only mixed cells need a finer
+    # level. Queries take and return metric x,y, in metres.
+
+    def __init__(self, grid_map, spawnable = None, factor = 2, min_size = 32):
+        self.factor = factor
+        self.levels = [grid_map]
+        self.all_spawnable = [] if spawnable is None else [np.asarray(spawnable, dtype = bool)]
+        self.any_spawnable = [] if spawnable is None else [np.asarray(spawnable, dtype = bool)]
+        self._graphs = {}
+        self._labels = None
+
+        grid = grid_map.grid
+        while min(grid.shape) // factor >= min_size:
+            grid = downsample_grid(grid, factor)
+            self.levels.append(GridMap(grid, grid_map.resolution * factor ** (len(self.levels)), grid_map.origin))
+            if spawnable is not None:
+                self.all_spawnable.append(reduce_blocks(self.all_spawnable[-1], factor, False, np.logical_and))
+                self.any_spawnable.append(reduce_blocks(self.any_spawnable[-1], factor, False, np.logical_or))
+
+    @classmethod
+    def from_grid_map(cls, grid_map, buffer, metric = "square", factor = 2, min_size = 32):
+        # builds the pyramid with the spawnable mask of the given buffer:
+        return cls(grid_map, grid_map.spawnable_mask(buffer, metric), factor, min_size)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def _cells(self, level, xy):
+        # the [y, x] cell of each metric point on one level, and whether it is on the map:
+        pixel = self.levels[level].to_pixel(np.asarray(xy, dtype = float).reshape(-1, 2))
+        shape = self.levels[level].shape
+        inside = (pixel >= 0).all(axis = 1) & (pixel[:,0] < shape[1]) & (pixel[:,1] < shape[0])
+        return np.clip(pixel[:,1], 0, shape[0] - 1), np.clip(pixel[:,0], 0, shape[1] - 1), inside
+
+    def spawnable_at(self, xy, start = None):
+        # this function tells whether each metric point is spawnable, starting at the coarsest level (or start)
+        # and only going down a level for the points whose cell is mixed. Returns the answers and the number
+        # of points that had to be looked up at full resolution:
+        if not self.all_spawnable:
+            raise ValueError("The pyramid was built without a spawnable mask")
+        xy = np.asarray(xy, dtype = float).reshape(-1, 2)
+        answer = np.zeros(len(xy), dtype = bool)
+        todo = np.arange(len(xy))
+
+        for level in range(len(self) - 1 if start is None else start, 0, -1):
+            if len(todo) == 0:
+                break
+            rows, cols, inside = self._cells(level, xy[todo])
+            certain_yes = inside & self.all_spawnable[level][rows, cols]
+            certain_no = ~inside | ~self.any_spawnable[level][rows, cols]
+            answer[todo[certain_yes]] = True
+            todo = todo[~(certain_yes | certain_no)]
+
+        refined = len(todo)
+        if refined:
+            rows, cols, inside = self._cells(0, xy[todo])
+            answer[todo] = inside & self.all_spawnable[0][rows, cols]
+        return answer, refined
+
+    def preselect_sites(self, sites, level):
+        # this function keeps the sites (pixel x,y on level 0) whose whole cell on the given level is
+        # spawnable, which picks sites in open space with about one coarse cell of room around them:
+        sites = np.asarray(sites).reshape(-1, 2)
+        scale = self.factor ** level
+        return sites[self.all_spawnable[level][sites[:,1] // scale, sites[:,0] // scale]]
+
+    def components(self):
+        # the full resolution labels of the pieces of spawnable space, 0 off it. A diagonal step of the
+        # navigation graph needs both cells beside it, so its pieces are exactly the 4-connected ones:
+        if self._labels is None:
+            from scipy.ndimage import label
+            self._labels = label(self.all_spawnable[0])[0]
+        return self._labels
+
+    def graph(self, level):
+        # the navigation graph over the cells of a level that are entirely spawnable, built on first use. A
+        # cell with any wall in it is left out, so paths never cut through thin walls or closed doors. Step
+        # lengths are in metres, so distances on every level are comparable:
+        if level not in self._graphs:
+            from .distance_field import NavigationGraph
+            self._graphs[level] = NavigationGraph(self.all_spawnable[level], self.levels[level].resolution)
+        return self._graphs[level]
+
+    def _snap(self, level, cells):
+        # the graph node of each x,y cell of a level, or of the nearest node among its 8 neighbours for cells
+        # that are only partly spawnable, with the length of that step in metres. -1 where there is none:
+        graph = self.graph(level)
+        offsets = np.array(SNAP_OFFSETS)
+        candidates = graph.nodes((cells[:, None, :] + offsets[None]).reshape(-1, 2)).reshape(len(cells), len(offsets))
+        first = np.argmax(candidates >= 0, axis = 1)
+        nodes = candidates[np.arange(len(cells)), first]
+        gaps = np.hypot(*offsets[first].T) * self.levels[level].resolution
+        return nodes, gaps
+
+    def estimate_distances(self, source, xy, level = None):
+        # this function estimates the travel distance in metres from a metric source point to each metric
+        # point, on a coarse level (the coarsest with at least 64 cells on the short side by default):
+        # - points outside the source's piece of spawnable space, at full resolution, are inf
+        # - the others are looked up on the level's graph of entirely spawnable cells, from the nearest such
+        #   cell, so the estimate is quantized to the coarse cells
+        # - points the coarse graph can't connect to the source, through a corridor narrower than a coarse
+        #   cell, are retried one level finer, down to full resolution, where the distance is exact
+        # Raises ValueError if the source isn't spawnable:
+        if level is None:
+            level = max([k for k, grid_map in enumerate(self.levels) if min(grid_map.shape) >= 64], default = 0)
+        xy = np.asarray(xy, dtype = float).reshape(-1, 2)
+        source = np.asarray(source, dtype = float).reshape(-1, 2)[:1]
+        result = np.full(len(xy), np.inf)
+
+        labels = self.components()
+        rows, cols, inside = self._cells(0, source)
+        piece = labels[rows, cols][0] if inside[0] else 0
+        if piece == 0:
+            raise ValueError(f"Source {tuple(source[0])} is not in spawnable space")
+        rows, cols, inside = self._cells(0, xy)
+        todo = np.flatnonzero(inside & (labels[rows, cols] == piece))
+
+        for k in range(level, -1, -1):
+            if len(todo) == 0:
+                break
+            source_node, source_gap = self._snap(k, self.levels[k].to_pixel(source))
+            if source_node[0] < 0:
+                continue
+            graph = self.graph(k)
+            field = graph.field(graph.points(source_node[:1]))
+            nodes, gaps = self._snap(k, self.levels[k].to_pixel(xy[todo]))
+            estimate = np.where(nodes >= 0, field.distance[nodes], np.inf) + gaps + source_gap[0]
+            found = np.isfinite(estimate)
+            result[todo[found]] = estimate[found]
+            todo = todo[~found]
+        return result
@@ -0,0 +1,110 @@
+########## Import Libraries ##########
+
+import numpy as np
+import tkinter as tk
+from matplotlib.lines import Line2D
+
+########## Define Functions and Classes #########
+
+# colours of the static map layers, as 0-255 RGB:
+BACKGROUND_COLOUR = (255, 255, 255)
+BODY_COLOUR = (255, 255, 255)
+BORDER_COLOUR = (0, 0, 0)
+SPAWNABLE_COLOUR = (183, 219, 206)
+
+def map_image(body, border, spawnable):
+    # this function paints the body, border and spawnable masks, all indexed [y, x], into one RGB image of the
+    # same shape, so the whole map can be drawn as a single artist instead of one scatter marker per pixel:
+    image = np.empty((*np.shape(body), 3), dtype = np.uint8)
+    image[:] = BACKGROUND_COLOUR
+    for mask, colour in zip((body, border, spawnable), (BODY_COLOUR, BORDER_COLOUR, SPAWNABLE_COLOUR)):
+        image[np.asarray(mask, dtype = bool)] = colour
+    return image
+
+class MapRenderer:
+    # this is the drawing layer of the interactive map. The map is drawn once as an image, and the robots
+    # and the task are persistent artists which are moved in place and blitted over a saved copy of the
+    # background, so a button press only redraws the markers and the legend. The background is saved again
+    # on every full draw, which also covers zooming, panning and resizing the window. The map layers are the
+    # body, border and spawnable masks, as GridMap.body_mask, GridMap.border_mask and the spawnable mask.
+
+    def __init__(self, ax, canvas, body, border, spawnable):
+        self.ax = ax
+        self.canvas = canvas
+        self.background = None
+
+        image = map_image(body, border, spawnable)
+        height, width = image.shape[:2]
+        ax.imshow(image, origin = 'lower', interpolation = 'nearest', extent = (-0.5, width - 0.5, -0.5, height - 0.5))
+
+        self.task_marker = ax.plot([], [], 'ro', markersize = 15, animated = True)[0]
+        self.robot_markers = ax.scatter([], [], animated = True, zorder = 3)
+        self.legend = None
+
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_markers()
+
+    def _draw_markers(self):
+        self.ax.draw_artist(self.task_marker)
+        self.ax.draw_artist(self.robot_markers)
+        if self.legend is not None:
+            self.ax.draw_artist(self.legend)
+
+    def blit(self):
+        # this function redraws only the markers and the legend, on top of the saved background:
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_markers()
+        self.canvas.blit(self.ax.bbox)
+
+    def set_fleet(self, positions):
+        # a new fleet changes the marker colours and the legend as well as the positions:
+        colours = [f'C{i % 10}' for i in range(len(positions))]
+        self.robot_markers.set_offsets(np.asarray(positions).reshape(-1, 2))
+        self.robot_markers.set_facecolor(colours)
+        self.robot_markers.set_edgecolor(colours)
+
+        handles = [Line2D([], [], marker = 'o', linestyle = '', color = colour, label = f'Robot {i}')
+                   for i, colour in enumerate(colours, start = 1)]
+        handles.append(Line2D([], [], marker = 'o', linestyle = '', color = 'r', label = 'Task'))
+        self.legend = self.ax.legend(handles = handles, loc = 'lower right')
+        self.legend.set_animated(True)
+        self.blit()
+
+    def move_robots(self, positions):
+        self.robot_markers.set_offsets(np.asarray(positions).reshape(-1, 2))
+        self.blit()
+
+    def set_task(self, location):
+        # one x,y task location, or an (N,2) array of them:
+        locations = np.asarray(location).reshape(-1, 2)
+        self.task_marker.set_data(locations[:,0], locations[:,1])
+        self.blit()
+
+class Sidebar:
+    # this is the robot sidebar, which keeps one label per robot and only rewrites the text of labels that
+    # changed, creating or destroying labels only when the fleet size changes
+
+    def __init__(self, frame, label_width = 40):
+        self.frame = frame
+        self.label_width = label_width # in characters
+        self.labels = []
+
+    def update(self, texts):
+        while len(self.labels) < len(texts):
+            label = tk.Label(self.frame, width = self.label_width, anchor = 'w', justify = 'left', padx = 5, pady = 2)
+            label.pack(anchor = 'w', padx = 5, pady = 2)
+            self.labels.append(label)
+
+        for label in self.labels[len(texts):]:
+            label.destroy()
+        del self.labels[len(texts):]
+
+        for label, text in zip(self.labels, texts):
+            if label.cget('text') != text:
+                label.config(text = text)
@@ -0,0 +1,124 @@
+########## Import Libraries ##########
+
+import numpy as np
+import json
+import struct
+from .fleet import RobotFleet
+
+########## Define Functions ##########
+
+# A mission file is laid out as:
+# - the magic bytes, the format version (uint16) and the header length (uint32), little endian
+# - a JSON header holding the map key, the metadata, and the dtype, shape and byte offset of every column
+# - the raw column data, each column starting on an 8 byte boundary so it can be memory-mapped in place
+# The map itself is not stored, only the map cache key (map hash, buffer and site spacing) it was made on.
+
+MAGIC = b"RMIS"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<4sHI")
+ALIGNMENT = 8
+
+FLEET_COLUMNS = RobotFleet.COLUMNS
+TASK_COLUMNS = ("task_locations",)
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_mission(file_path, fleet, task_locations, map_key = None, extra = None, **meta):
+    # this function writes a fleet and its task locations to a mission file. extra can hold more named arrays,
+    # for example the sites, for missions that have to be readable without the map cache:
+    if isinstance(fleet, dict):
+        fleet = RobotFleet.from_robots(fleet)
+
+    columns = {name: np.ascontiguousarray(getattr(fleet, name)) for name in FLEET_COLUMNS}
+    columns['task_locations'] = np.ascontiguousarray(np.asarray(task_locations, dtype = np.int64).reshape(-1, 2))
+    for name, array in (extra or {}).items():
+        columns[name] = np.ascontiguousarray(array)
+
+    # offsets are measured from the start of the data first. The header then has to hold offsets that include
+    # its own length, so it is grown until the shifted offsets fit in front of the data:
+    layout = {}
+    offset = 0
+    for name, array in columns.items():
+        offset = _aligned(offset)
+        layout[name] = offset
+        offset += array.nbytes
+
+    header = {'version': FORMAT_VERSION, 'map_key': map_key, 'n_robots': len(fleet),
+              'n_tasks': len(columns['task_locations']), 'meta': meta, 'columns': {}}
+    data_start = PREAMBLE.size
+    while True:
+        header['columns'] = {name: {'dtype': array.dtype.str, 'shape': list(array.shape),
+                                    'offset': data_start + layout[name]} for name, array in columns.items()}
+        header_bytes = json.dumps(header).encode()
+        if PREAMBLE.size + len(header_bytes) <= data_start:
+            break
+        data_start = _aligned(PREAMBLE.size + len(header_bytes))
+    header_bytes = header_bytes.ljust(data_start - PREAMBLE.size)
+    table = header['columns']
+
+    with open(file_path, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for name, array in columns.items():
+            file.seek(table[name]['offset'])
+            file.write(array.tobytes())
+
+def _parse_header(raw, file_path):
+    magic, version, header_length = PREAMBLE.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{file_path} is not a mission file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{file_path} is mission format version {version}, this loader reads up to {FORMAT_VERSION}")
+    return json.loads(raw[PREAMBLE.size:PREAMBLE.size + header_length])
+
+def read_header(file_path):
+    # this function reads only the header of a mission file, without touching any column data:
+    with open(file_path, 'rb') as file:
+        raw = file.read(PREAMBLE.size)
+        header_length = PREAMBLE.unpack(raw)[2]
+        return _parse_header(raw + file.read(header_length), file_path)
+
+def read_mission(file_path, columns = None, mmap = False):
+    # this function reads the header and the requested columns of a mission file (all of them by default),
+    # and returns them as (header, {name: array}). With mmap the columns are memory-mapped views instead of
+    # copies, so only the pages that are actually touched get read:
+    if mmap:
+        header = read_header(file_path)
+        names = columns or list(header['columns'])
+        arrays = {}
+        for name in names:
+            entry = header['columns'][name]
+            dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+            if 0 in shape:
+                # an empty column has nothing to map:
+                arrays[name] = np.empty(shape, dtype = dtype)
+            else:
+                arrays[name] = np.memmap(file_path, dtype = dtype, mode = 'r', offset = entry['offset'], shape = shape)
+        return header, arrays
+
+    # small files are read in one call, which is what makes reading thousands of them a second possible:
+    with open(file_path, 'rb') as file:
+        raw = file.read()
+    header = _parse_header(raw, file_path)
+    names = columns or list(header['columns'])
+    arrays = {}
+    for name in names:
+        entry = header['columns'][name]
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape']))
+        arrays[name] = np.frombuffer(raw, dtype = dtype, count = count, offset = entry['offset']).reshape(entry['shape'])
+    return header, arrays
+
+def fleet_from_columns(arrays, copy = True):
+    # this function builds a RobotFleet from columns already read by read_mission, copied unless copy is
+    # False, which keeps memory-mapped columns mapped:
+    fleet = RobotFleet(0)
+    for name in FLEET_COLUMNS:
+        setattr(fleet, name, arrays[name].copy() if copy else arrays[name])
+    return fleet
+
+def load_fleet(file_path, mmap = False):
+    # this function reads only the fleet of a mission file, as a RobotFleet:
+    header, arrays = read_mission(file_path, FLEET_COLUMNS, mmap)
+    return fleet_from_columns(arrays, copy = not mmap)
@@ -0,0 +1,352 @@
+########## Import Libraries ##########
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from .distance_field import FieldCache
+from .fleet import RobotFleet
+from .grid_map import preprocess_map
+from .map_cache import MapCache, map_hash
+from .robot import LOCOMOTIONS
+from .spawn import mission_seed
+from .simulation import MissionSimulation
+
+########## Define Functions and Classes ##########
+
+# named locomotion mixes, as the probability of each mode of locomotion in LOCOMOTIONS order:
+LOCOMOTION_MIXES = {
+    "uniform": (0.25, 0.25, 0.25, 0.25),
+    "aerial": (0.70, 0.10, 0.10, 0.10),
+    "wheeled": (0.10, 0.45, 0.45, 0.00),
+    "legged": (0.10, 0.10, 0.10, 0.70),
+}
+
+# the columns of the results file, parameters first, then the metrics of each mission:
+PARAMETERS = ("map", "buffer", "fleet_size", "camera_fraction", "locomotion_mix")
+METRICS = ("completed", "completed_per_robot", "idle_fraction", "stranded", "mean_battery", "total_distance",
+           "distance_per_task", "seconds")
+COLUMNS = ("scenario", "replicate", "seed") + PARAMETERS + METRICS
+
+def parse_mix(mix):
+    # this function turns a mix name, or weights like "2:1:1:0", into probabilities in LOCOMOTIONS order:
+    if mix in LOCOMOTION_MIXES:
+        weights = LOCOMOTION_MIXES[mix]
+    else:
+        try:
+            weights = [float(weight) for weight in mix.split(':')]
+        except ValueError:
+            raise ValueError(f"Unknown locomotion mix: {mix}") from None
+    if len(weights) != len(LOCOMOTIONS) or min(weights) < 0 or sum(weights) <= 0:
+        raise ValueError(f"A locomotion mix needs {len(LOCOMOTIONS)} non-negative weights, got {mix}")
+    return np.array(weights) / sum(weights)
+
+def scenario_name(params, digest):
+    # a short stable name for one point of the grid, which is what resuming matches finished runs by. The map
+    # goes in by its file name and the start of its content hash, digest, so maps sharing a file name in
+    # different folders stay apart, and a map that is moved still resumes:
+    return (f"{os.path.splitext(os.path.basename(params['map']))[0]}.{digest[:8]}-b{params['buffer']}"
+            f"-n{params['fleet_size']}-c{params['camera_fraction']:g}-{params['locomotion_mix']}")
+
+def expand_grid(grid):
+    # this function expands a parameter grid, a dictionary of lists keyed by PARAMETERS, into one dictionary
+    # per combination, in a fixed order:
+    missing = [name for name in PARAMETERS if name not in grid]
+    if missing:
+        raise ValueError(f"The parameter grid is missing {', '.join(missing)}")
+    return [dict(zip(PARAMETERS, values)) for values in itertools.product(*(grid[name] for name in PARAMETERS))]
+
+class RunningStats:
+    # this is the running count, mean and variance of one metric, updated one value at a time with Welford's
+    # method, so summaries never need the results in memory. Non-finite values are counted but left out.
+
+    def __init__(self):
+        self.count = 0
+        self.skipped = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value):
+        value = float(value)
+        if not math.isfinite(value):
+            self.skipped += 1
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def sem(self):
+        # standard error of the mean:
+        return self.std / math.sqrt(self.count) if self.count else 0.0
+
+    def as_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, 'sem': self.sem, 'skipped': self.skipped}
+
+########## Worker Processes ##########
+
+# the number of sites tasks spawn on in every mission of a map:
+TASK_POOL = 64
+
+# the maps each worker process has loaded, by cache key: the sites, a field cache holding the map's
+# navigation graph and the fields of its task pool, which stay warm across every mission the process runs on
+# that map, the traversable mask, and the task pool:
+_maps = {}
+
+def _load_map(cache_root, key):
+    if key not in _maps:
+        grid_map, spawnable, sites = MapCache(cache_root).load_map(key)
+        traversable = np.array(spawnable)
+        field_cache = FieldCache()
+        field_cache.add_map(key, traversable)
+        sites = np.asarray(sites, dtype = np.int64)
+        # the same task pool for every mission on the map, in every process, so its fields are only computed once:
+        pool = np.random.default_rng(0).choice(len(sites), min(TASK_POOL, len(sites)), replace = False)
+        _maps[key] = (sites, field_cache, traversable, sites[np.sort(pool)])
+    return _maps[key]
+
+def run_mission(job):
+    # this function runs one randomized mission headless and returns its row of the results file:
+    scenario, replicate, seed, params, cache_root, key, steps, n_tasks, separation = job
+    start = time.perf_counter()
+    sites, field_cache, traversable, task_pool = _load_map(cache_root, key)
+    rng = np.random.default_rng(seed)
+
+    n = params['fleet_size']
+    n_camera = int(np.clip(round(params['camera_fraction'] * n), 0, n))
+    fleet = RobotFleet.generate(sites, n, n_camera, rng = rng, separation = separation,
+                                locomotion_mix = parse_mix(params['locomotion_mix']))
+    simulation = MissionSimulation(fleet, sites, traversable, n_tasks, field_cache = field_cache, map_key = key, rng = rng,
+                                   task_pool = task_pool)
+
+    idle = [0]
+    def count_idle(simulation):
+        idle[0] += int((simulation.robot_task < 0).sum())
+    simulation.run(steps, on_step = count_idle)
+
+    completed = simulation.completed
+    total_distance = float(fleet.travelled_distance.sum())
+    metrics = {
+        'completed': completed,
+        'completed_per_robot': completed / n,
+        'idle_fraction': idle[0] / (n * steps) if steps else 0.0,
+        'stranded': int((fleet.battery < simulation.min_battery).sum()),
+        'mean_battery': float(fleet.battery.mean()),
+        'total_distance': total_distance,
+        'distance_per_task': total_distance / completed if completed else math.inf,
+        'seconds': time.perf_counter() - start,
+    }
+    return {'scenario': scenario, 'replicate': replicate, 'seed': seed, **params, **metrics}
+
+########## Results File ##########
+
+def _repair(out_path):
+    # a run killed mid-write can leave half a row at the end of the file, which is cut off here so the
+    # next row starts on a line of its own:
+    with open(out_path, 'rb+') as file:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        if size == 0:
+            return
+        file.seek(max(0, size - (1 << 16)))
+        tail = file.read()
+        if tail.endswith(b'\n'):
+            return
+        cut = tail.rfind(b'\n')
+        file.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+
+def read_results(out_path):
+    # this function streams the rows already in a results file, checking it was written with these columns:
+    with open(out_path, newline = '') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        if tuple(header) != COLUMNS:
+            raise ValueError(f"{out_path} has different columns, write the sweep to a new file")
+        for values in reader:
+            if len(values) == len(COLUMNS):
+                yield dict(zip(COLUMNS, values))
+
+class Sweep:
+    # this is a Monte Carlo sweep over a parameter grid: every combination of map, buffer, fleet size, camera
+    # fraction and locomotion mix (a scenario) is run for a number of randomized missions (replicates). Each
+    # mission is a fleet spawned and simulated headless for a fixed number of steps, and its metrics are
+    # appended to a csv as soon as it finishes, so results are never held in memory and a killed sweep loses
+    # at most the missions that were running. Running it again with the same output resumes: finished
+    # (scenario, replicate) pairs are skipped, and the summaries pick up from the rows already written.
+    # Replicate i of every scenario uses the same seed, so scenarios are compared on the same random draws.
+
+    def __init__(self, grid, replicates, out_path, steps = 500, n_tasks = 4, separation = 0, base_seed = 0,
+                 spacing = 4, resolution = 0.05, cache = None):
+        self.scenarios = expand_grid(grid)
+        self.replicates = replicates
+        self.out_path = out_path
+        self.steps = steps
+        self.n_tasks = n_tasks
+        self.separation = separation
+        self.base_seed = base_seed
+        self.spacing = spacing
+        self.resolution = resolution
+        self.cache = cache or MapCache()
+        self.stats = {}          # scenario: {metric: RunningStats}
+        self.done = set()        # finished (scenario, replicate) pairs
+
+        for params in self.scenarios:
+            if params['fleet_size'] < 1:
+                raise ValueError("A fleet needs at least 1 robot")
+            if not 0 <= params['camera_fraction'] <= 1:
+                raise ValueError(f"The camera fraction must be between 0 and 1, got {params['camera_fraction']}")
+            parse_mix(params['locomotion_mix'])
+
+        # each map is hashed once, for the scenario names:
+        self.digests = {map_path: map_hash(map_path) for map_path in {params['map'] for params in self.scenarios}}
+
+    def scenario(self, params):
+        return scenario_name(params, self.digests[params['map']])
+
+    def _record(self, row):
+        scenario = row['scenario']
+        stats = self.stats.setdefault(scenario, {metric: RunningStats() for metric in METRICS})
+        for metric in METRICS:
+            stats[metric].push(row[metric])
+        self.done.add((scenario, int(row['replicate'])))
+
+    def resume(self):
+        # this function reads back what an earlier run already wrote, and returns the number of rows:
+        self.stats, self.done = {}, set()
+        if not os.path.isfile(self.out_path):
+            return 0
+        _repair(self.out_path)
+        for row in read_results(self.out_path):
+            self._record(row)
+        return len(self.done)
+
+    def jobs(self):
+        # every mission still to run, preprocessing each (map, buffer) once into the map cache, here, so the
+        # workers only memory-map it:
+        keys = {}
+        for params in self.scenarios:
+            map_path, buffer = params['map'], params['buffer']
+            if (map_path, buffer) not in keys:
+                self.cache.preprocess(map_path, buffer, self.spacing,
+                                      lambda: preprocess_map(map_path, buffer, self.spacing, self.resolution))
+                keys[map_path, buffer] = self.cache.key(map_path, buffer, self.spacing)
+
+        for replicate in range(self.replicates):
+            seed = mission_seed(self.base_seed, replicate)
+            for params in self.scenarios:
+                scenario = self.scenario(params)
+                if (scenario, replicate) not in self.done:
+                    yield (scenario, replicate, seed, params, self.cache.root, keys[params['map'], params['buffer']],
+                           self.steps, self.n_tasks, self.separation)
+
+    def run(self, workers = None, on_row = None):
+        # this function runs every unfinished mission across a pool of processes. Only a few jobs per worker
+        # are in flight at a time, and each row is written and flushed as it comes back, in whatever order
+        # the missions finish. on_row(row) is called after each. Returns the number of missions run:
+        self.resume()
+        workers = workers or os.cpu_count()
+        jobs = self.jobs()
+        count = 0
+
+        new_file = not os.path.isfile(self.out_path) or os.path.getsize(self.out_path) == 0
+        with open(self.out_path, 'a', newline = '') as file, ProcessPoolExecutor(workers) as pool:
+            writer = csv.DictWriter(file, COLUMNS)
+            if new_file:
+                writer.writeheader()
+
+            pending = set(pool.submit(run_mission, job) for job in itertools.islice(jobs, 4 * workers))
+            while pending:
+                finished, pending = wait(pending, return_when = FIRST_COMPLETED)
+                for future in finished:
+                    row = future.result()
+                    writer.writerow(row)
+                    file.flush()
+                    self._record(row)
+                    count += 1
+                    if on_row is not None:
+                        on_row(row)
+                pending |= set(pool.submit(run_mission, job) for job in itertools.islice(jobs, len(finished)))
+        return count
+
+    def summary(self):
+        # the running statistics of every scenario, in grid order, with its parameters:
+        result = []
+        for params in self.scenarios:
+            scenario = self.scenario(params)
+            if scenario in self.stats:
+                stats = {metric: stat.as_dict() for metric, stat in self.stats[scenario].items()}
+                result.append({'scenario': scenario, **params, 'metrics': stats})
+        return result
+
+    def write_summary(self, path = None):
+        path = path or os.path.splitext(self.out_path)[0] + '.summary.json'
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent = 1)
+        return path
+
+def print_summary(summary, metrics = ("completed_per_robot", "idle_fraction", "stranded", "distance_per_task")):
+    # this function prints the mean and standard error of a few metrics for every scenario:
+    width = max([len(entry['scenario']) for entry in summary], default = 8)
+    print(f"{'scenario':<{width}}  {'runs':>6}" + "".join(f"  {metric:>22}" for metric in metrics))
+    for entry in summary:
+        stats = entry['metrics']
+        cells = "".join(f"  {stats[metric]['mean']:>12.4g} ± {stats[metric]['sem']:<7.2g}" for metric in metrics)
+        print(f"{entry['scenario']:<{width}}  {stats[METRICS[0]]['count']:>6}" + cells)
+
+#################     Main   #####################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run a Monte Carlo sweep of randomized missions over a parameter grid.")
+    parser.add_argument('maps', nargs = '+', help = "paths to the map pngs")
+    parser.add_argument('--buffers', type = int, nargs = '+', default = [6], help = "buffers to sweep")
+    parser.add_argument('--fleet-sizes', type = int, nargs = '+', default = [5], help = "fleet sizes to sweep")
+    parser.add_argument('--camera-fractions', type = float, nargs = '+', default = [0.5],
+                        help = "fractions of the fleet with a camera, the rest measure")
+    parser.add_argument('--mixes', nargs = '+', default = ["uniform"],
+                        help = f"locomotion mixes, by name ({', '.join(LOCOMOTION_MIXES)}) or as weights like 2:1:1:0")
+    parser.add_argument('-n', '--replicates', type = int, default = 100, help = "missions per scenario")
+    parser.add_argument('--steps', type = int, default = 500, help = "simulation steps per mission")
+    parser.add_argument('--tasks', type = int, default = 4, help = "number of open tasks per mission")
+    parser.add_argument('--separation', type = int, default = 0, help = "minimum spacing between spawned robots, in pixels")
+    parser.add_argument('--seed', type = int, default = 0, help = "base seed, mission seeds are derived from it")
+    parser.add_argument('--spacing', type = int, default = 4, help = "spacing between spawnable sites")
+    parser.add_argument('--resolution', type = float, default = 0.05, help = "map resolution in metres per pixel")
+    parser.add_argument('--workers', type = int, default = None, help = "number of worker processes, defaults to one per core")
+    parser.add_argument('-o', '--out', default = 'sweep_results.csv', help = "csv to append results to, resumed if it exists")
+    args = parser.parse_args(argv)
+
+    grid = {'map': args.maps, 'buffer': args.buffers, 'fleet_size': args.fleet_sizes,
+            'camera_fraction': args.camera_fractions, 'locomotion_mix': args.mixes}
+    sweep = Sweep(grid, args.replicates, args.out, args.steps, args.tasks, args.separation, args.seed,
+                  args.spacing, args.resolution)
+
+    resumed = sweep.resume()
+    total = len(sweep.scenarios) * args.replicates
+    if resumed:
+        print(f"Resuming {args.out}: {resumed} of {total} missions already done")
+
+    start = time.perf_counter()
+    def progress(row):
+        done = len(sweep.done)
+        if done % 100 == 0 or done == total:
+            print(f"{done}/{total} missions, {time.perf_counter() - start:.1f} s")
+
+    count = sweep.run(args.workers, on_row = progress)
+    print(f"Ran {count} missions in {time.perf_counter() - start:.2f} s")
+    print_summary(sweep.summary())
+    print(f"Summary written to {sweep.write_summary()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+########## Import Libraries ##########
+
+import random
+
+########## Define Functions and Classes #########
+
+SENSORS = ["Camera", "Measurement"]
+LOCOMOTIONS = ["Drone", "4-Wheeled", "Diff. Drive", "2-Legged"]
+
+# range of the random offset a for each mode of locomotion, the movement weight is 1.00 + a*random():
+WEIGHT_RANGES = {
+    "Drone": (-0.05,0.05),
+    "4-Wheeled": (-0.10,0.10),
+    "Diff. Drive": (0.00,0.10),
+    "2-Legged": (0.00,0.15),
+}
+
+def sample_weight(locomotion):
+    # this function samples the movement weight of one robot from its mode of locomotion:
+    a = random.uniform(*WEIGHT_RANGES[locomotion])
+    return round(1.00 + a*random.random(),2)
+
+class Robot:
+    # this is the class robot, wherein all robotic objects are made from. Robots consist of:
+    # - an ID tag, for referencing
+    # - a sensor type, either camera or measurement
+    # - a mode of locomotion, which dictates their;
+    # - movement weight, which is to symbolize the risk and ease at which a robot can move
+    # - a battery level
+    # - a load history, which is how many times they have gone to a task location
+    # - their position within space
+
+    # constructor to initialize attributes:
+    def __init__(self, id, sensor, locomotion, battery, load, position, travelled_distance):
+        self.id = id
+        self.sensor = sensor
+        self.locomotion = locomotion
+        self.weight = sample_weight(self.locomotion)
+        self.battery = battery
+        self.load = load
+        self.position = position
+        self.travelled_distance = 0
+
+    # for when user wants to randomize the attributes of the robots:
+    def randomize_attributes(self):
+        self.locomotion = random.choice(LOCOMOTIONS)
+        self.weight = sample_weight(self.locomotion)
+        self.battery = round(random.uniform(0.3,1.0),2)
+
+    # method of querying the class:
+    def display_robot_info(self):
+        return (f"Robot ID: {self.id}\n"
+                f"Sensor Type: {self.sensor}\n"
+                f"Mode of Locomotion: {self.locomotion}\n"
+                f"Movement Weight: {self.weight}\n"
+                f"Battery Level: {self.battery}\n"
+                f"Load History: {self.load}\n"
+                f"Current Position: {self.position}\n"
+                f"Travelled Distance: {self.travelled_distance}")
@@ -0,0 +1,251 @@
+########## Import Libraries ##########
+
+import numpy as np
+from .allocation import COST_COLUMNS, allocate, cost_matrix, generate_task_rows
+from .distance_field import FieldCache
+
+########## Define Functions and Classes #########
+
+class MissionSimulation:
+    # this is the time-stepped mission simulation. Every step advances the whole fleet at once with array
+    # operations. Robots with a task move along the distance field of the task towards it at speed / movement
+    # weight pixels per step, and drain drain * distance * movement weight of battery. On arrival a robot's
+    # load goes up by one, the task is respawned on a random site of the task pool, and the robot is free for
+    # the next allocation. Allocation only runs on those events, once per step for all of them, never on a
+    # plain step.
+    # The fields of the tasks are kept in one FieldStack, so each robot is just a cell and the distance it has
+    # left, and a step moves it a few cells down the field instead of along a stored path.
+
+    def __init__(self, fleet, sites, traversable, n_tasks = 1, speed = 1.0, drain = 1e-4, min_battery = 0.05,
+                 field_cache = None, map_key = 'map', rng = None, task_pool = 64):
+        self.fleet = fleet
+        self.sites = np.asarray(sites)
+        self.speed = speed              # pixels per step, before dividing by the movement weight
+        self.drain = drain              # battery used per pixel, before multiplying by the movement weight
+        self.min_battery = min_battery  # robots below this are not sent to new tasks
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.map_key = map_key
+        self.field_cache = field_cache or FieldCache()
+        self.field_cache.add_map(map_key, traversable)
+
+        # tasks spawn on a pool of task sites, task_pool random sites or the given (N,2) array of them, and the
+        # stack holds one row per pool site, so respawning a task never runs dijkstra again. The field cache is
+        # grown to hold the whole pool, and simulations sharing a cache and a pool share the fields. With
+        # task_pool = None tasks spawn on any site, the stack holds one row per task, and each respawn runs
+        # one full-map dijkstra:
+        if task_pool is None:
+            self.task_sites = self.sites
+        elif np.ndim(task_pool) == 0:
+            count = min(int(task_pool), len(self.sites))
+            self.task_sites = self.sites[np.sort(self.rng.choice(len(self.sites), count, replace = False))]
+        else:
+            self.task_sites = np.asarray(task_pool).reshape(-1, 2)
+        self.pooled = task_pool is not None
+        if self.pooled:
+            self.field_cache.max_fields = max(self.field_cache.max_fields, len(self.task_sites))
+
+        task_rows, self.task_sensors = generate_task_rows(len(self.task_sites), n_tasks, self.rng)
+        self.task_locations = self.task_sites[task_rows].astype(np.int64)
+        if self.pooled:
+            self.stack = self.field_cache.stack(map_key, self.task_sites)
+            self.task_row = task_rows                    # stack row of each task
+        else:
+            self.stack = self.field_cache.stack(map_key, self.task_locations)
+            self.task_row = np.arange(n_tasks)
+        self.task_robot = np.full(n_tasks, -1, dtype = np.int64)     # robot working on each task, -1 if open
+        self.robot_task = np.full(len(fleet), -1, dtype = np.int64)  # task of each robot, -1 if idle
+        self.completed = 0
+        self.steps = 0
+
+        self.column = self.stack.columns(fleet.position)    # stack column of each robot's cell, -1 off the graph
+        self.remaining = np.zeros(len(fleet))                # distance each robot has left to its task
+
+        # robots that went idle and tasks that opened since the last allocation. Everything else that is idle
+        # or open was already left over by the last allocation, which never leaves a feasible pair behind:
+        self.fresh_robots = np.ones(len(fleet), dtype = bool)
+        self.fresh_tasks = np.ones(n_tasks, dtype = bool)
+        self.replan()
+
+    def _costs(self, robots, tasks):
+        # the allocation costs of some robots for some tasks, shape (robots, tasks), from the stacked distances:
+        if len(robots) == 0 or len(tasks) == 0:
+            return np.full((len(robots), len(tasks)), np.inf)
+        distances = self.stack.distances(self.task_row[tasks], self.column[robots])
+        fleet = self.fleet.take(robots, COST_COLUMNS)
+        return cost_matrix(fleet, self.task_locations[tasks], self.task_sensors[tasks], distances)
+
+    def replan(self):
+        # this function allocates the open tasks to the idle robots that still have battery, and points them
+        # at their task. The last allocation never leaves a feasible pair behind, and idle robots don't change,
+        # so only pairs with a fresh robot or a fresh task can be feasible. Costs are only built for those, and
+        # only the robots and tasks with a feasible pair are allocated. Returns whether any robot got a task:
+        idle = (self.robot_task < 0) & (self.fleet.battery >= self.min_battery)
+        open_tasks = self.task_robot < 0
+        fresh_robots, old_robots = np.flatnonzero(idle & self.fresh_robots), np.flatnonzero(idle & ~self.fresh_robots)
+        fresh_tasks, old_tasks = np.flatnonzero(open_tasks & self.fresh_tasks), np.flatnonzero(open_tasks & ~self.fresh_tasks)
+        self.fresh_robots[idle] = False
+        self.fresh_tasks[open_tasks] = False
+        if len(fresh_robots) == 0 and len(fresh_tasks) == 0:
+            return False
+
+        # every idle robot against the fresh tasks, and the fresh robots against the other open tasks:
+        robots, tasks = np.concatenate((fresh_robots, old_robots)), np.concatenate((fresh_tasks, old_tasks))
+        if len(robots) == 0 or len(tasks) == 0:
+            return False
+        fresh_task_costs = self._costs(robots, fresh_tasks)
+        fresh_robot_costs = self._costs(fresh_robots, old_tasks)
+        rows = np.isfinite(fresh_task_costs).any(axis = 1)
+        rows[:len(fresh_robots)] |= np.isfinite(fresh_robot_costs).any(axis = 1)
+        columns = np.concatenate((np.isfinite(fresh_task_costs).any(axis = 0), np.isfinite(fresh_robot_costs).any(axis = 0)))
+        if not rows.any():
+            return False
+
+        # the costs of the robots and tasks with a feasible pair, where old robots against old tasks stay inf:
+        fresh_rows, fresh_columns = rows[:len(fresh_robots)], columns[:len(fresh_tasks)]
+        costs = np.full((rows.sum(), columns.sum()), np.inf)
+        costs[:, :fresh_columns.sum()] = fresh_task_costs[rows][:, fresh_columns]
+        costs[:fresh_rows.sum(), fresh_columns.sum():] = fresh_robot_costs[fresh_rows][:, columns[len(fresh_tasks):]]
+        robots, tasks = robots[rows], tasks[columns]
+        allocation = allocate(self.fleet.take(robots, COST_COLUMNS), self.task_locations[tasks], self.task_sensors[tasks],
+                              costs = costs)
+
+        robot, task = robots[allocation.robots], tasks[allocation.tasks]
+        self.robot_task[robot] = task
+        self.task_robot[task] = robot
+        self.remaining[robot] = self.stack.distance[self.task_row[task], self.column[robot]]
+        return len(allocation) > 0
+
+    def step(self):
+        # this function advances the whole fleet by one time step:
+        fleet = self.fleet
+        moving = (self.robot_task >= 0) & (fleet.battery > 0)
+
+        # how far each robot gets this step, limited by the distance to its task and by what its battery has left:
+        distance = np.where(moving, self.speed / fleet.weight, 0.0)
+        distance = np.minimum(distance, self.remaining)
+        distance = np.minimum(distance, fleet.battery / (self.drain * fleet.weight))
+
+        self.remaining -= distance
+        fleet.travelled_distance += distance
+        fleet.battery = np.maximum(fleet.battery - self.drain * distance * fleet.weight, 0.0)
+
+        # each moving robot steps down its task's field to the last cell that is still at least the remaining
+        # distance from the task, usually one or two cells:
+        rows = np.flatnonzero(moving)
+        if len(rows):
+            stack_rows, columns = self.task_row[self.robot_task[rows]], self.column[rows]
+            target = self.remaining[rows] - 1e-9
+            active = np.arange(len(rows))
+            while len(active):
+                after = self.stack.next[stack_rows[active], columns[active]]
+                hop = (after >= 0) & (self.stack.distance[stack_rows[active], np.maximum(after, 0)] >= target[active])
+                active = active[hop]
+                columns[active] = after[hop]
+            self.column[rows] = columns
+            fleet.position[rows] = self.stack.points(columns)
+
+        self.steps += 1
+        arrived = moving & (self.remaining <= 1e-9)
+        stranded = moving & ~arrived & (fleet.battery <= 0)
+        if arrived.any() or stranded.any():
+            self._finish(arrived, stranded)
+
+    def _finish(self, arrived, stranded):
+        # arrived robots complete their task, which respawns somewhere else, and stranded robots give theirs up.
+        # Every event of the step goes into one allocation:
+        fleet = self.fleet
+        fleet.load[arrived] += 1
+        done = self.robot_task[arrived]
+        self.completed += len(done)
+
+        rows, sensors = generate_task_rows(len(self.task_sites), len(done), self.rng)
+        self.task_locations[done] = self.task_sites[rows]
+        self.task_sensors[done] = sensors
+        if self.pooled:
+            self.task_row[done] = rows
+        else:
+            for task in done:
+                self.stack.set(self.task_row[task], self.field_cache.field(self.map_key, self.task_locations[task]))
+
+        released = self.robot_task[arrived | stranded]
+        self.task_robot[released] = -1
+        self.fresh_tasks[released] = True
+        self.robot_task[arrived | stranded] = -1
+        self.remaining[arrived | stranded] = 0.0
+        self.fresh_robots[arrived | stranded] = True
+        self.replan()
+
+    def run(self, steps, on_step = None):
+        # this function runs headless for a number of steps, calling on_step(simulation) after each if given:
+        for _ in range(steps):
+            self.step()
+            if on_step is not None:
+                on_step(self)
+        return self
+
+class Playback:
+    # this is the handle of a simulation playing in the window, as returned by watch. stop ends the playback
+    # after the frame that is being computed, if there is one, and on_stop(simulation) is called once no
+    # frame of it can run anymore, whether it was stopped, ran out of frames or failed. Until then the
+    # simulation, its fleet and whatever on_step writes to still belong to the playback.
+
+    def __init__(self, simulation, on_stop = None):
+        self.simulation = simulation
+        self.on_stop = on_stop
+        self.stopped = False     # no new frame will be started
+        self.running = False     # a frame is being computed
+        self.done = False        # on_stop has been called
+
+    def stop(self):
+        self.stopped = True
+        if not self.running:
+            self._done()
+
+    def _done(self):
+        if not self.done:
+            self.done = True
+            if self.on_stop is not None:
+                self.on_stop(self.simulation)
+
+def watch(simulation, window, renderer, steps_per_frame = 1, interval = 30, frames = None, on_frame = None, worker = None,
+          on_step = None, on_stop = None):
+    # this function plays a simulation in the interactive map window, advancing steps_per_frame steps every
+    # interval milliseconds through the window's after() loop, and moving the markers with the renderer.
+    # It stops after frames frames if given, and calls on_frame(simulation) after each frame, for example
+    # to refresh the sidebar. With a BackgroundWorker, the steps run in the background and the window only
+    # draws; the next frame is only started once the last one is drawn, so the two never overlap. on_step is
+    # passed on to run, for example to record the trajectory. Returns the Playback, to stop it with:
+    playback = Playback(simulation, on_stop)
+    shown = [0]
+
+    def draw(simulation):
+        playback.running = False
+        if playback.stopped:
+            playback._done()
+            return
+        renderer.set_task(simulation.task_locations)
+        renderer.move_robots(simulation.fleet.position)
+        if on_frame is not None:
+            on_frame(simulation)
+        shown[0] += 1
+        if frames is None or shown[0] < frames:
+            window.after(interval, frame)
+        else:
+            playback.stop()
+
+    def failed(error):
+        playback.running = False
+        playback.stop()
+        worker.on_error(error)
+
+    def frame():
+        if playback.stopped:
+            return
+        playback.running = True
+        if worker is None:
+            draw(simulation.run(steps_per_frame, on_step))
+        else:
+            worker.submit('simulation', simulation.run, steps_per_frame, on_step, on_done = draw, on_error = failed)
+
+    window.after(interval, frame)
+    return playback
@@ -0,0 +1,199 @@
+########## Import Libraries ##########
+
+import numpy as np
+
+########## Define Functions and Classes #########
+
+class SiteIndex:
+    # this is a uniform grid hash over the sites, for spatial queries on whole arrays of points at once. The
+    # sites are sorted by the cell they fall in, so the sites of any cell are one contiguous run, found from
+    # cell_start. The queries:
+    # - within, every (point, site) pair closer than a radius
+    # - spawn, a batch of sites that are all at least a minimum separation apart, Poisson-disk style
+    # - nearest, the closest site to each point
+    # within and spawn only look at the block of cells around each point instead of at every site.
+
+    def __init__(self, sites, cell_size = 16):
+        self.sites = np.asarray(sites, dtype = np.int64).reshape(-1, 2)
+        if len(self.sites) == 0:
+            raise ValueError("Cannot index an empty set of sites")
+        self.cell_size = cell_size
+        self.origin = self.sites.min(axis = 0)
+        self.cells = (self.sites.max(axis = 0) - self.origin) // cell_size + 1    # cells along x and y
+
+        keys = self._cell_keys(self.sites)
+        self.order = np.argsort(keys, kind = 'stable')
+        self.sorted_x, self.sorted_y = self.sites[self.order].T.copy()
+        self.cell_start = np.searchsorted(keys[self.order], np.arange(self.cells[0] * self.cells[1] + 1))
+        self._tree = None
+
+    @classmethod
+    def of(cls, sites, cell_size = 16):
+        # returns sites as it is if it is already an index, and builds one otherwise:
+        return sites if isinstance(sites, cls) else cls(sites, cell_size)
+
+    def __len__(self):
+        return len(self.sites)
+
+    def _cell_keys(self, points):
+        cell = (points - self.origin) // self.cell_size
+        return cell[:,1] * self.cells[0] + cell[:,0]
+
+    def _candidates(self, points, reach):
+        # this function returns every (point row, sorted position) pair where the site lies in the block of cells
+        # reach cells around the point's cell, as two flat arrays. Positions index sorted_x and sorted_y, where the
+        # sites of a cell sit next to each other, and map to site numbers through order:
+        cell = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        steps = np.arange(-reach, reach + 1)
+        dx, dy = [offset.ravel() for offset in np.meshgrid(steps, steps)]
+        cx, cy = cell[:, None, 0] + dx, cell[:, None, 1] + dy
+        rows = np.broadcast_to(np.arange(len(points))[:, None], cx.shape)
+
+        inside = (cx >= 0) & (cy >= 0) & (cx < self.cells[0]) & (cy < self.cells[1])
+        rows, keys = rows[inside], cy[inside] * self.cells[0] + cx[inside]
+        start, counts = self.cell_start[keys], self.cell_start[keys + 1] - self.cell_start[keys]
+
+        # expand each cell's [start, end) run into the positions it holds:
+        total = counts.sum()
+        run_base = np.repeat(start - (np.cumsum(counts) - counts), counts)
+        return np.repeat(rows, counts), np.arange(total) + run_base
+
+    def _squared(self, points, rows, positions):
+        dx = self.sorted_x.take(positions) - points[:,0].take(rows)
+        dy = self.sorted_y.take(positions) - points[:,1].take(rows)
+        return dx * dx + dy * dy
+
+    def within(self, points, radius):
+        # this function returns every (point row, site number) pair with the site no further than radius from
+        # the point, as two flat arrays, grouped by point:
+        points = np.asarray(points).reshape(-1, 2)
+        rows, positions = self._candidates(points, int(np.ceil(radius / self.cell_size)))
+        keep = self._squared(points, rows, positions) <= radius * radius
+        return rows[keep], self.order[positions[keep]]
+
+    def nearest(self, points):
+        # this function returns the number of the closest site to each point, and its distance. The nearest site
+        # can be any number of cells away from points in open space or off the map, which a fixed block of cells
+        # can't bound, so this query uses a KD-tree, built on first use:
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(self.sites)
+        distance, best = self._tree.query(np.asarray(points).reshape(-1, 2))
+        return best.astype(np.int64), distance
+
+    def spawn(self, n, separation, rng = None, exclude = None):
+        # this function draws n distinct sites, all at least separation apart and at least separation from
+        # every point in exclude (robots already placed, for example), and returns their numbers. It works in
+        # rounds: a batch of random free sites is drawn, every site that has no closer-than-separation
+        # neighbour earlier in the batch is kept, and the sites around the kept ones are taken off the free
+        # set. Each round keeps at least one site, and usually most of what is needed.
+        # Raises ValueError if the free space runs out first.
+        rng = rng if rng is not None else np.random.default_rng()
+        free = np.ones(len(self), dtype = bool)
+        if exclude is not None and len(exclude):
+            free[self._blocked(exclude, separation)[1]] = False
+
+        chosen = []
+        need = n
+        position = np.full(len(self), -1, dtype = np.int64)
+        while need > 0:
+            candidates = np.flatnonzero(free)
+            if len(candidates) == 0:
+                raise ValueError(f"Only {n - need} of {n} sites fit {separation} pixels apart")
+            batch = rng.choice(candidates, min(len(candidates), 2 * need), replace = False)
+
+            # the rank of each batch site is its place in the batch, a site is kept when it comes before every
+            # batch site it conflicts with:
+            rows, sites = self._blocked(self.sites[batch], separation)
+            position[batch] = np.arange(len(batch))
+            conflicts = (position[sites] >= 0) & (sites != batch[rows])
+            earliest = np.arange(len(batch))
+            np.minimum.at(earliest, rows[conflicts], position[sites[conflicts]])
+            kept = np.flatnonzero(earliest == np.arange(len(batch)))[:need]
+            position[batch] = -1
+
+            chosen.append(batch[kept])
+            need -= len(kept)
+            free[batch[kept]] = False
+            free[sites[np.isin(rows, kept)]] = False
+        return np.concatenate(chosen)
+
+    def _blocked(self, points, separation):
+        # the (point row, site number) pairs closer than separation, which can't both be used:
+        points = np.asarray(points).reshape(-1, 2)
+        rows, positions = self._candidates(points, int(np.ceil(separation / self.cell_size)))
+        keep = self._squared(points, rows, positions) < separation * separation
+        return rows[keep], self.order[positions[keep]]
+
+    def spawn_points(self, n, separation, rng = None, exclude = None):
+        # the same as spawn, returning the x,y points of the sites:
+        return self.sites[self.spawn(n, separation, rng, exclude)]
+
+########## Reference Check ##########
+
+def check_index(cell_sizes = (4, 16, 37), radii = (0, 3.5, 10, 40), separations = (1, 5, 12), seed = 0):
+    # this function checks the index on the sites of every map in maps/ against brute force with cdist:
+    # - within returns exactly the (point, site) pairs no further than the radius, grouped by point
+    # - nearest returns a site at the smallest distance
+    # - spawn returns distinct sites at least separation apart and from every excluded point, and raises
+    #   ValueError when the sites can't all fit
+    # Query points are drawn over and around the map, so some fall outside every cell:
+    import os
+    from scipy.spatial.distance import cdist
+    from .grid_map import GridMap
+    from .map import MAPS_DIR
+    from .sites import sites_from_mask
+
+    rng = np.random.default_rng(seed)
+    failures = 0
+
+    for map_name in sorted(os.listdir(MAPS_DIR)):
+        if not map_name.endswith('.png'):
+            continue
+        grid_map = GridMap.read(os.path.join(MAPS_DIR, map_name))
+        sites = sites_from_mask(grid_map.spawnable_mask(6), 4)
+        if len(sites) == 0:
+            continue
+        height, width = grid_map.shape
+        points = rng.integers((-20, -20), (width + 20, height + 20), size = (200, 2))
+        distance = cdist(points, sites)
+
+        for cell_size in cell_sizes:
+            index = SiteIndex(sites, cell_size)
+            ok = True
+
+            for radius in radii:
+                rows, found = index.within(points, radius)
+                expected = np.argwhere(distance <= radius)
+                ok &= bool(np.all(np.diff(rows) >= 0))
+                ok &= np.array_equal(np.unique(np.column_stack((rows, found)), axis = 0).reshape(-1, 2), expected)
+                ok &= len(rows) == len(expected)
+
+            best, best_distance = index.nearest(points)
+            ok &= np.allclose(best_distance, distance.min(axis = 1))
+            ok &= np.allclose(distance[np.arange(len(points)), best], best_distance)
+
+            for separation in separations:
+                exclude = sites[rng.choice(len(sites), min(3, len(sites)), replace = False)]
+                n = max(1, len(sites) // (4 * separation * separation))
+                chosen = index.spawn(n, separation, np.random.default_rng(seed), exclude)
+                spread = cdist(sites[chosen], sites[chosen])
+                ok &= len(chosen) == n and len(np.unique(chosen)) == n
+                ok &= bool((spread[np.triu_indices(n, 1)] >= separation).all())
+                ok &= bool((cdist(sites[chosen], exclude) >= separation).all())
+
+            try:
+                index.spawn(len(sites) + 1, 1)
+                ok = False
+            except ValueError:
+                pass
+
+            failures += not ok
+            print(f"{map_name:<20} {len(sites):>6} sites  cell size = {cell_size:<3} {'OK' if ok else 'MISMATCH'}")
+
+    return failures
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    raise SystemExit(1 if check_index() else 0)
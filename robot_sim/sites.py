@@ -0,0 +1,72 @@
+########## Import Libraries ##########
+
+import numpy as np
+from .clearance import points_to_mask
+
+########## Define Functions ##########
+
+LATTICES = ("square", "hex")
+
+def mask_bounds(mask):
+    # this function returns xmin, xmax, ymin, ymax of the true pixels of a mask, or None if it is empty
+    cols = np.flatnonzero(mask.any(axis = 0))
+    rows = np.flatnonzero(mask.any(axis = 1))
+    if len(cols) == 0:
+        return None
+    return cols[0], cols[-1], rows[0], rows[-1]
+
+def first_on_grid(start, grid_start, step):
+    # the first coordinate at or after start on the grid grid_start + k*step, for gridding part of a mask
+    # on the same lattice as the whole of it:
+    return grid_start + max(0, -(-(start - grid_start) // step)) * step
+
+def grid_hits(mask, x0, y0, x_step, y_step, xmax, ymax):
+    # strided view of the mask over one set of grid rows, up to xmax and ymax included, returned as x,y
+    # points of the true cells:
+    window = mask[y0:ymax + 1:y_step, x0:xmax + 1:x_step]
+    yi, xi = np.nonzero(window)
+    return np.column_stack((x0 + xi*x_step, y0 + yi*y_step))
+
+def lattice_grids(bounds, spacing, offset = (0,0), lattice = "square"):
+    # this function returns the rectangular grids that make up a lattice over the bounding box, as
+    # (x0, y0, x step, y step). A square lattice is one grid, and a hex lattice is two, with the odd rows
+    # shifted by half a spacing:
+    if lattice not in LATTICES:
+        raise ValueError(f"Unknown site lattice: {lattice}")
+    xmin, xmax, ymin, ymax = bounds
+
+    if lattice == "square":
+        return [(xmin + offset[0] % spacing, ymin + offset[1] % spacing, spacing, spacing)]
+    row_step = max(1, int(round(spacing * np.sqrt(3) / 2)))
+    x0 = xmin + offset[0] % spacing
+    y0 = ymin + offset[1] % (2*row_step)
+    return [(x0, y0, spacing, 2*row_step), (x0 + spacing // 2, y0 + row_step, spacing, 2*row_step)]
+
+def sites_from_mask(mask, spacing, offset = (0,0), lattice = "square"):
+    # The function lays a grid of points spaced by spacing over the bounding box of the spawnable mask, and keeps
+    # the points that land on spawnable cells. The mask is indexed as mask[y, x], in the same frame as the points.
+    # - offset shifts the grid away from the lower left corner of the bounding box, in pixels
+    # - lattice is either "square", or "hex" where every second row is shifted by half a spacing and rows are
+    #   spacing*sqrt(3)/2 apart, for a denser layout with the same nearest neighbour spacing
+
+    if lattice not in LATTICES:
+        raise ValueError(f"Unknown site lattice: {lattice}")
+
+    bounds = mask_bounds(mask)
+    if bounds is None:
+        return np.empty((0,2), dtype = np.int64)
+    xmin, xmax, ymin, ymax = bounds
+    sites = np.vstack([grid_hits(mask, x0, y0, x_step, y_step, xmax, ymax)
+                       for x0, y0, x_step, y_step in lattice_grids(bounds, spacing, offset, lattice)])
+
+    # order the sites column by column, as the original grid walk did:
+    order = np.lexsort((sites[:,1], sites[:,0]))
+    return sites[order].astype(np.int64)
+
+def sites_from_points(spawnable, spacing, offset = (0,0), lattice = "square"):
+    # this function takes spawnable space as an (N,2) array of x,y points, rasterizes it, and grids it
+    spawnable = np.asarray(spawnable).reshape(-1, 2)
+    if len(spawnable) == 0:
+        return np.empty((0,2), dtype = np.int64)
+    shape = (spawnable[:,1].max() + 1, spawnable[:,0].max() + 1)
+    return sites_from_mask(points_to_mask(spawnable, shape), spacing, offset, lattice)
@@ -0,0 +1,48 @@
+########## Import Libraries ##########
+
+import numpy as np
+import random
+from .robot import Robot, LOCOMOTIONS
+
+########## Define Functions ##########
+
+def spawner(sites):
+    # this function randomly selects points from the sites, and returns them:
+    x,y = random.choice(sites)
+    task = np.array([x,y])
+    return task
+
+def generate_robots(sites, fleet_range = (2,5)):
+    # this function generates a random fleet of between fleet_range[0] and fleet_range[1] robots, with at
+    # least one camera robot and one measurement robot, and spawns each of them on the sites:
+    m = random.randrange(fleet_range[0], fleet_range[1] + 1)
+    x = random.randrange(1,m)
+    robots = {}
+
+    for num in range(1, m+1):
+        robot_name = f"robot{num}"
+        # camera robots first, then measurement robots:
+        robots[robot_name] = Robot(
+            id = num,
+            sensor = "Camera" if num <= x else "Measurement",
+            locomotion = random.choice(LOCOMOTIONS),
+            battery = round(random.uniform(0.3,1.0),2),
+            load = 0,
+            position = spawner(sites),
+            travelled_distance = 0
+        )
+    return robots
+
+def mission_seed(base_seed, index):
+    # this function derives the seed of one mission from the base seed and the mission index, so a mission
+    # comes out the same no matter how many workers share the batch or in what order they run:
+    return int(np.random.SeedSequence([base_seed, index]).generate_state(1)[0])
+
+def generate_mission(sites, fleet_range = (2,5), n_tasks = 1, seed = None):
+    # this function generates one mission, which is a fleet of robots and n_tasks task locations:
+    if seed is not None:
+        random.seed(seed)
+
+    task_locations = np.array([spawner(sites) for _ in range(n_tasks)])
+    robots = generate_robots(sites, fleet_range)
+    return {'robots': robots, 'task_locations': task_locations, 'seed': seed}
@@ -0,0 +1,190 @@
+########## Import Libraries ##########
+
+import numpy as np
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .clearance import METRICS, spawnable_mask
+from .grid_map import GridMap, UNKNOWN, FREE, OCCUPIED
+from .sites import LATTICES, lattice_grids, first_on_grid, grid_hits, sites_from_mask
+from . import instrument
+
+########## Define Functions ##########
+
+# Tiled preprocessing for maps too big to hold as full-size masks and point arrays. Everything lives in
+# memory-mapped .npy files in one output directory:
+# - grid.npy, the occupancy grid as uint8 cell codes, bottom row first like GridMap
+# - spawnable.npy, the spawnable mask as bool, indexed [y, x]
+# - sites.npy, the (N,2) int64 x,y sites, in the same column by column order as sites_from_mask
+# The map is split into tile x tile blocks. Each block is read together with a halo of buffer pixels on every
+# side, which holds every border pixel that can block a pixel of the block, so the clearance of the block is
+# exact and the results match a single pass over the whole map.
+
+DEFAULT_TILE = 2048
+
+def _tiles(shape, tile):
+    # the (y0, y1, x0, x1) blocks covering a grid of the given shape:
+    return [(y0, min(y0 + tile, shape[0]), x0, min(x0 + tile, shape[1]))
+            for y0 in range(0, shape[0], tile) for x0 in range(0, shape[1], tile)]
+
+def write_grid(file_path, out_dir, band = DEFAULT_TILE):
+    # this function decodes the map png and writes its occupancy grid to grid.npy, a band of rows at a time so
+    # no full-size mask is ever built. PNG decoding itself still needs the whole image in memory once:
+    import cv2
+
+    image = cv2.imread(file_path, 0)
+    if image is None:
+        raise FileNotFoundError(file_path)
+
+    height = image.shape[0]
+    grid = np.lib.format.open_memmap(os.path.join(out_dir, 'grid.npy'), mode = 'w+', dtype = np.uint8, shape = image.shape)
+    for r0 in range(0, height, band):
+        r1 = min(r0 + band, height)
+        rows = np.flipud(image[r0:r1])
+        cells = np.full(rows.shape, UNKNOWN, dtype = np.uint8)
+        cells[rows >= 254] = FREE
+        cells[rows == 0] = OCCUPIED
+        grid[height - r1:height - r0] = cells
+    grid.flush()
+    return grid.shape
+
+def _spawnable_tile(job):
+    # this function computes the spawnable mask of one block from its halo window, writes it into
+    # spawnable.npy, and returns the bounding box of its spawnable pixels, or None:
+    out_dir, (y0, y1, x0, x1), buffer, metric = job
+    grid = np.load(os.path.join(out_dir, 'grid.npy'), mmap_mode = 'r')
+    hy0, hy1 = max(0, y0 - buffer), min(grid.shape[0], y1 + buffer)
+    hx0, hx1 = max(0, x0 - buffer), min(grid.shape[1], x1 + buffer)
+
+    window = np.asarray(grid[hy0:hy1, hx0:hx1])
+    block = spawnable_mask(window == FREE, window == OCCUPIED, buffer, metric)[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+
+    spawnable = np.load(os.path.join(out_dir, 'spawnable.npy'), mmap_mode = 'r+')
+    spawnable[y0:y1, x0:x1] = block
+    spawnable.flush()
+
+    cols = np.flatnonzero(block.any(axis = 0))
+    rows = np.flatnonzero(block.any(axis = 1))
+    if len(cols) == 0:
+        return None
+    return x0 + cols[0], x0 + cols[-1], y0 + rows[0], y0 + rows[-1]
+
+def _sites_tile(job):
+    # this function returns the sites of the global lattice that fall inside one block:
+    out_dir, (y0, y1, x0, x1), bounds, spacing, offset, lattice = job
+    spawnable = np.load(os.path.join(out_dir, 'spawnable.npy'), mmap_mode = 'r')
+    xmax, ymax = min(bounds[1], x1 - 1), min(bounds[3], y1 - 1)
+
+    hits = []
+    for gx0, gy0, x_step, y_step in lattice_grids(bounds, spacing, offset, lattice):
+        tx0, ty0 = first_on_grid(x0, gx0, x_step), first_on_grid(y0, gy0, y_step)
+        if tx0 <= xmax and ty0 <= ymax:
+            hits.append(grid_hits(spawnable, tx0, ty0, x_step, y_step, xmax, ymax))
+    return np.vstack(hits) if hits else np.empty((0,2), dtype = np.int64)
+
+def _run(jobs, function, workers):
+    # runs the jobs in order, across a process pool unless there is only one worker:
+    if workers == 1:
+        return [function(job) for job in jobs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(function, jobs))
+
+def preprocess_tiled(file_path, out_dir, buffer, spacing, offset = (0,0), lattice = "square", metric = "square",
+                     tile = DEFAULT_TILE, workers = None):
+    # this function runs steps 1 to 3 tile by tile across a pool of processes, and returns the grid, spawnable
+    # mask and sites memory-mapped from out_dir. The results are identical to GridMap.spawnable_mask and
+    # sites_from_mask on the whole map:
+    if lattice not in LATTICES:
+        raise ValueError(f"Unknown site lattice: {lattice}")
+    os.makedirs(out_dir, exist_ok = True)
+    workers = workers or os.cpu_count()
+
+    # Step 1 - read map:
+    with instrument.span('read_map', tiled = True) as info:
+        shape = write_grid(file_path, out_dir, tile)
+        info['shape'] = shape
+    tiles = _tiles(shape, tile)
+
+    # Step 2 - determine spawnable space, one block and its halo at a time:
+    with instrument.span('spawnable_space', buffer = buffer, tiles = len(tiles)):
+        np.lib.format.open_memmap(os.path.join(out_dir, 'spawnable.npy'), mode = 'w+', dtype = bool, shape = shape).flush()
+        tile_bounds = [bounds for bounds in _run([(out_dir, block, buffer, metric) for block in tiles], _spawnable_tile, workers)
+                       if bounds is not None]
+
+    # Step 3 - determine spawnable sites, on the lattice anchored at the bounding box of the whole mask:
+    with instrument.span('spawnable_sites', spacing = spacing) as info:
+        if tile_bounds:
+            tile_bounds = np.array(tile_bounds)
+            bounds = (tile_bounds[:,0].min(), tile_bounds[:,1].max(), tile_bounds[:,2].min(), tile_bounds[:,3].max())
+            jobs = [(out_dir, block, bounds, spacing, offset, lattice) for block in tiles]
+            sites = np.vstack(_run(jobs, _sites_tile, workers))
+            sites = sites[np.lexsort((sites[:,1], sites[:,0]))].astype(np.int64)
+        else:
+            sites = np.empty((0,2), dtype = np.int64)
+        np.save(os.path.join(out_dir, 'sites.npy'), sites)
+        info['sites'] = len(sites)
+
+    return load_tiled(out_dir)
+
+def load_tiled(out_dir):
+    # memory-maps the grid, spawnable mask and sites written by preprocess_tiled:
+    return tuple(np.load(os.path.join(out_dir, f'{name}.npy'), mmap_mode = 'r') for name in ('grid', 'spawnable', 'sites'))
+
+########## Reference Check ##########
+
+def check_maps(buffers = (0, 6), spacings = (3, 4), tile = 97, workers = 2):
+    # this function compares preprocess_tiled with GridMap.spawnable_mask and sites_from_mask on the whole
+    # map, for every map in maps/, clearance metric and site lattice. The tile is small and odd so every map
+    # is split into many blocks whose edges fall between lattice points:
+    from .map import MAPS_DIR
+    failures = 0
+
+    for map_name in sorted(os.listdir(MAPS_DIR)):
+        if not map_name.endswith('.png'):
+            continue
+        file_path = os.path.join(MAPS_DIR, map_name)
+        grid_map = GridMap.read(file_path)
+
+        for metric in METRICS:
+            for buffer in buffers:
+                expected_mask = grid_map.spawnable_mask(buffer, metric)
+                for spacing in spacings:
+                    for lattice in LATTICES:
+                        with tempfile.TemporaryDirectory() as out_dir:
+                            grid, spawnable, sites = preprocess_tiled(file_path, out_dir, buffer, spacing, lattice = lattice,
+                                                                      metric = metric, tile = tile, workers = workers)
+                            ok = (np.array_equal(grid, grid_map.grid) and np.array_equal(spawnable, expected_mask) and
+                                  np.array_equal(sites, sites_from_mask(expected_mask, spacing, lattice = lattice)))
+                            del grid, spawnable, sites
+                        failures += not ok
+                        print(f"{map_name:<20} {metric:<10} buffer = {buffer:<3} spacing = {spacing:<3} {lattice:<7} "
+                              f"{'OK' if ok else 'MISMATCH'}")
+
+    return failures
+
+#################     Main   #####################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Preprocess a large map tile by tile into memory-mapped arrays.")
+    parser.add_argument('map', nargs = '?', help = "path to the map png")
+    parser.add_argument('-o', '--out', help = "directory to write grid.npy, spawnable.npy and sites.npy to")
+    parser.add_argument('--buffer', type = int, default = 6, help = "spacing used to scale back spawnable space from the border")
+    parser.add_argument('--spacing', type = int, default = 4, help = "spacing between spawnable sites")
+    parser.add_argument('--tile', type = int, default = DEFAULT_TILE, help = "side of each tile in pixels")
+    parser.add_argument('--workers', type = int, default = None, help = "number of worker processes, defaults to one per core")
+    parser.add_argument('--check', action = 'store_true', help = "compare the tiled results with a whole-map pass on every map in maps/")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        raise SystemExit(1 if check_maps() else 0)
+    if args.map is None or args.out is None:
+        parser.error("a map and --out are required unless --check is given")
+
+    start = time.perf_counter()
+    grid, spawnable, sites = preprocess_tiled(args.map, args.out, args.buffer, args.spacing, tile = args.tile, workers = args.workers)
+    print(f"{grid.shape[1]}x{grid.shape[0]} map, {len(sites)} sites in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+########## Import Libraries ##########
+
+import numpy as np
+import json
+import os
+import struct
+
+########## Define Functions and Classes #########
+
+# A trajectory log is laid out as:
+# - the magic bytes, the format version (uint16) and the header length (uint32), little endian
+# - a JSON header holding the fleet size, the keyframe interval, the map key and the metadata, padded to an
+#   8 byte boundary
+# - the records, one per step, appended as the mission runs. Records come in blocks of keyframe_interval
+#   steps: the first step of a block is a keyframe holding absolute positions, the others are delta records
+#   holding each robot's move since the step before. Battery and load are stored whole in every record.
+# Every record of a kind has the same width, so the byte offset of any step follows from its number alone,
+# and the number of steps from the file size. There is no step count to keep up to date in the header, so
+# the file is only ever appended to, and a crash can at most leave half a record at the end, which is ignored.
+
+MAGIC = b"RTRJ"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<4sHI")
+ALIGNMENT = 8
+
+def record_dtypes(n_robots):
+    # the keyframe and delta record of a fleet of n_robots. Deltas are int16, which holds any move within a
+    # map of up to 32767 pixels on a side, at half the size of the int32 positions of a keyframe:
+    keyframe = np.dtype([('position', '<i4', (n_robots, 2)), ('battery', '<f4', (n_robots,)), ('load', '<i4', (n_robots,))])
+    delta = np.dtype([('position', '<i2', (n_robots, 2)), ('battery', '<f4', (n_robots,)), ('load', '<i4', (n_robots,))])
+    return keyframe, delta
+
+class _Layout:
+    # the byte arithmetic shared by the writer and the reader:
+
+    def __init__(self, header, data_start):
+        self.header = header
+        self.n_robots = header['n_robots']
+        self.interval = header['keyframe_interval']
+        self.data_start = data_start
+        self.keyframe, self.delta = record_dtypes(self.n_robots)
+        self.block_size = self.keyframe.itemsize + (self.interval - 1) * self.delta.itemsize
+
+    def offset(self, step):
+        # byte offset of a step's record, from the start of the file:
+        block, index = divmod(step, self.interval)
+        offset = self.data_start + block * self.block_size
+        if index:
+            offset += self.keyframe.itemsize + (index - 1) * self.delta.itemsize
+        return offset
+
+    def steps_in(self, size):
+        # the number of whole records in a file of size bytes:
+        blocks, rest = divmod(max(0, size - self.data_start), self.block_size)
+        if rest < self.keyframe.itemsize:
+            return blocks * self.interval
+        return blocks * self.interval + 1 + (rest - self.keyframe.itemsize) // self.delta.itemsize
+
+def read_header(file_path):
+    # this function reads the header of a trajectory log, and returns it with the offset of the first record:
+    with open(file_path, 'rb') as file:
+        magic, version, header_length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not a trajectory log")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{file_path} is trajectory format version {version}, this reader reads up to {FORMAT_VERSION}")
+        header = json.loads(file.read(header_length))
+    return header, PREAMBLE.size + header_length
+
+class TrajectoryWriter:
+    # this is the recorder side of a trajectory log. Each append writes one record, a keyframe every
+    # keyframe_interval steps and a delta record otherwise; with delta = False every record is a keyframe.
+    # Writes go through a buffered file, so recording a step costs one small write, and flush makes what was
+    # recorded so far visible to readers. With append = True an existing log of the same fleet size is
+    # continued, after cutting off any half-written record at its end.
+
+    def __init__(self, file_path, n_robots, keyframe_interval = 256, delta = True, map_key = None, append = False, **meta):
+        self.file_path = file_path
+        if append and os.path.isfile(file_path) and os.path.getsize(file_path) > 0:
+            header, data_start = read_header(file_path)
+            if header['n_robots'] != n_robots:
+                raise ValueError(f"{file_path} records {header['n_robots']} robots, not {n_robots}")
+            self._use_layout(_Layout(header, data_start))
+            self.steps = self.layout.steps_in(os.path.getsize(file_path))
+            self.previous = TrajectoryLog(file_path).step(self.steps - 1)[0] if self.steps else None
+            self.file = open(file_path, 'r+b')
+            self.file.truncate(self.layout.offset(self.steps))
+            self.file.seek(0, os.SEEK_END)
+            return
+
+        interval = keyframe_interval if delta else 1
+        if interval < 1:
+            raise ValueError("The keyframe interval must be at least 1")
+        header = {'version': FORMAT_VERSION, 'n_robots': n_robots, 'keyframe_interval': interval,
+                  'map_key': map_key, 'meta': meta}
+        header_bytes = json.dumps(header).encode()
+        header_bytes = header_bytes.ljust(-(-(PREAMBLE.size + len(header_bytes)) // ALIGNMENT) * ALIGNMENT - PREAMBLE.size)
+
+        self._use_layout(_Layout(header, PREAMBLE.size + len(header_bytes)))
+        self.steps = 0
+        self.previous = None
+        self.file = open(file_path, 'wb')
+        self.file.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        self.file.write(header_bytes)
+
+    def _use_layout(self, layout):
+        # one scratch record of each kind is kept, and reused by every append:
+        self.layout = layout
+        self._keyframe = np.zeros((), dtype = layout.keyframe)
+        self._delta = np.zeros((), dtype = layout.delta)
+
+    def append(self, positions, battery, load):
+        # this function records one step, from the (N,2) x,y positions and the battery and load of each robot:
+        positions = np.asarray(positions).reshape(-1, 2)
+        if len(positions) != self.layout.n_robots:
+            raise ValueError(f"The log records {self.layout.n_robots} robots, got {len(positions)}")
+
+        positions = positions.astype(np.int64)
+        if self.steps % self.layout.interval == 0:
+            record = self._keyframe
+            record['position'] = positions
+        else:
+            move = positions - self.previous
+            if np.abs(move).max(initial = 0) > np.iinfo(np.int16).max:
+                raise ValueError("A robot moved further than a delta record holds, record with delta = False")
+            record = self._delta
+            record['position'] = move
+        record['battery'] = battery
+        record['load'] = load
+
+        self.file.write(record.data)
+        self.previous = positions
+        self.steps += 1
+
+    def record(self, fleet):
+        # records the current state of a RobotFleet, which makes this usable as an on_step of a simulation
+        # through lambda simulation: writer.record(simulation.fleet):
+        self.append(fleet.position, fleet.battery, fleet.load)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryLog:
+    # this is the replay side of a trajectory log. The file is memory-mapped, so opening a log of any length
+    # reads nothing but the header, and only the pages of the steps asked for are ever read. Any step is
+    # found in constant time: its block's keyframe is at a computed offset, and the step is that keyframe
+    # plus the sum of at most keyframe_interval - 1 deltas. refresh picks up steps appended since opening.
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        header, data_start = read_header(file_path)
+        self.layout = _Layout(header, data_start)
+        self.header = header
+        self.n_robots = header['n_robots']
+        self.map_key = header['map_key']
+        self.refresh()
+
+    def refresh(self):
+        size = os.path.getsize(self.file_path)
+        self.steps = self.layout.steps_in(size)
+        self.raw = np.memmap(self.file_path, dtype = np.uint8, mode = 'r') if size else np.zeros(0, dtype = np.uint8)
+        return self.steps
+
+    def __len__(self):
+        return self.steps
+
+    def _records(self, dtype, offset, count):
+        return self.raw[offset:offset + count * dtype.itemsize].view(dtype)
+
+    def step(self, step):
+        # this function returns the positions, battery and load of every robot at one step:
+        if step < 0:
+            step += self.steps
+        if not 0 <= step < self.steps:
+            raise IndexError(f"Step {step} is outside the log's {self.steps} steps")
+        layout = self.layout
+        index = step % layout.interval
+        start = layout.offset(step - index)
+        keyframe = self._records(layout.keyframe, start, 1)[0]
+        if index == 0:
+            return keyframe['position'].astype(np.int64), keyframe['battery'].copy(), keyframe['load'].copy()
+
+        deltas = self._records(layout.delta, start + layout.keyframe.itemsize, index)
+        positions = keyframe['position'] + deltas['position'].sum(axis = 0, dtype = np.int64)
+        return positions, deltas[-1]['battery'].copy(), deltas[-1]['load'].copy()
+
+    def positions(self, step):
+        return self.step(step)[0]
+
+    def block(self, block):
+        # this function decodes the whole block of steps after one keyframe, as arrays of positions (steps, N, 2),
+        # battery (steps, N) and load (steps, N), with one cumulative sum over the deltas:
+        layout = self.layout
+        first = block * layout.interval
+        count = min(layout.interval, self.steps - first)
+        if count <= 0:
+            raise IndexError(f"Block {block} is outside the log")
+        keyframe = self._records(layout.keyframe, layout.offset(first), 1)
+        deltas = self._records(layout.delta, layout.offset(first) + layout.keyframe.itemsize, count - 1)
+
+        positions = np.empty((count, self.n_robots, 2), dtype = np.int64)
+        positions[0] = keyframe['position'][0]
+        positions[1:] = keyframe['position'][0] + np.cumsum(deltas['position'], axis = 0, dtype = np.int64)
+        battery = np.concatenate((keyframe['battery'], deltas['battery']))
+        load = np.concatenate((keyframe['load'], deltas['load']))
+        return positions, battery, load
+
+    def frames(self, start = 0, stop = None):
+        # this generator yields (step, positions, battery, load) for every step in [start, stop), decoding one
+        # block at a time, so reading a whole log in order never holds more than one block:
+        stop = self.steps if stop is None else min(stop, self.steps)
+        step = start
+        while step < stop:
+            block = step // self.layout.interval
+            positions, battery, load = self.block(block)
+            first = block * self.layout.interval
+            for index in range(step - first, min(len(positions), stop - first)):
+                yield first + index, positions[index], battery[index], load[index]
+            step = first + len(positions)
+
+########## Reference Check ##########
+
+def check_log(steps = 300, n_robots = 7, intervals = (1, 2, 7, 256), seed = 0):
+    # this function writes random trajectories at several keyframe intervals, with and without delta records,
+    # and reads them back against what was written:
+    # - step, for every step in random order and for negative steps, and frames over the whole log and part of it
+    # - a crash halfway, where half a record is left at the end of the file, then append = True: the partial
+    #   record must be cut off and the rest of the trajectory continue where the whole records end
+    # - refresh, picking up steps flushed after the log was opened
+    import tempfile
+    rng = np.random.default_rng(seed)
+    failures = 0
+
+    for interval in intervals:
+        for delta in (True, False):
+            positions = np.cumsum(rng.integers(-40, 41, size = (steps, n_robots, 2)), axis = 0) + 5000
+            battery = rng.random((steps, n_robots)).astype(np.float32)
+            load = rng.integers(0, 10, size = (steps, n_robots)).astype(np.int32)
+
+            def matches(log, step):
+                position, battery_now, load_now = log.step(step)
+                return (np.array_equal(position, positions[step]) and np.array_equal(battery_now, battery[step]) and
+                        np.array_equal(load_now, load[step]))
+
+            with tempfile.TemporaryDirectory() as out_dir:
+                path = os.path.join(out_dir, 'check.rtrj')
+                crash = steps // 2 + 1
+
+                with TrajectoryWriter(path, n_robots, interval, delta, map_key = 'check') as writer:
+                    for step in range(crash):
+                        writer.append(positions[step], battery[step], load[step])
+                    writer.flush()
+                    log = TrajectoryLog(path)
+                    ok = len(log) == crash
+                    # half a record, as a crash in the middle of a write would leave:
+                    writer.file.write(b'\x01' * (log.layout.delta.itemsize // 2 + 1))
+
+                with TrajectoryWriter(path, n_robots, interval, delta, append = True) as writer:
+                    ok &= writer.steps == crash
+                    for step in range(crash, steps - 1):
+                        writer.append(positions[step], battery[step], load[step])
+                    writer.flush()
+                    ok &= log.refresh() == steps - 1
+                    writer.append(positions[-1], battery[-1], load[-1])
+
+                log = TrajectoryLog(path)
+                ok &= len(log) == steps and log.map_key == 'check'
+                ok &= all(matches(log, step) for step in rng.permutation(steps))
+                ok &= np.array_equal(log.step(-1)[0], positions[-1])
+                try:
+                    log.step(steps)
+                    ok = False
+                except IndexError:
+                    pass
+
+                for start, stop in ((0, None), (interval // 2 + 1, steps - 3)):
+                    frames = list(log.frames(start, stop))
+                    expected = range(start, steps if stop is None else stop)
+                    ok &= [frame[0] for frame in frames] == list(expected)
+                    ok &= all(np.array_equal(frame[1], positions[step]) and np.array_equal(frame[2], battery[step]) and
+                              np.array_equal(frame[3], load[step]) for frame, step in zip(frames, expected))
+                del log
+
+            failures += not ok
+            print(f"interval = {interval:<4} delta = {str(delta):<6} {'OK' if ok else 'MISMATCH'}")
+
+    return failures
+
+#################     Main   #####################
+
+if __name__ == "__main__":
+    raise SystemExit(1 if check_log() else 0)
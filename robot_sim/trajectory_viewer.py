@@ -0,0 +1,140 @@
+########## Import Libraries ##########
+
+import argparse
+import matplotlib.pyplot as plt
+import matplotlib.backends.backend_tkagg as tkagg
+from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+import tkinter as tk
+from .map_cache import MapCache
+from .map_render import MapRenderer, Sidebar
+from .trajectory_log import TrajectoryLog
+
+########## Define Functions and Classes #########
+
+class Scrubber:
+    # this is the replay control of a trajectory log: a slider over every step, a play/pause button and
+    # single step buttons. Only the step under the slider is ever decoded, straight from the memory-mapped
+    # log, so a million step log scrubs as freely as a short one. Dragging the slider fires far more often
+    # than the window can draw, so moves are coalesced: only the newest one is shown, once the window is idle.
+
+    def __init__(self, parent, log, on_step, play_steps = 10, interval = 30):
+        self.log = log
+        self.on_step = on_step          # called with (step, positions, battery, load)
+        self.play_steps = play_steps    # steps advanced per frame while playing
+        self.interval = interval        # milliseconds between frames while playing
+        self.wanted = 0
+        self.shown = None
+        self.scheduled = False
+        self.playing = False
+
+        self.frame = tk.Frame(parent)
+        self.frame.pack(side = tk.BOTTOM, fill = tk.X, padx = 10, pady = 5)
+        tk.Button(self.frame, text = "<", command = lambda: self.seek(self.wanted - 1)).pack(side = tk.LEFT)
+        self.play_button = tk.Button(self.frame, text = "Play", width = 6, command = self.toggle)
+        self.play_button.pack(side = tk.LEFT, padx = 5)
+        tk.Button(self.frame, text = ">", command = lambda: self.seek(self.wanted + 1)).pack(side = tk.LEFT)
+        tk.Button(self.frame, text = "Reload", command = self.reload).pack(side = tk.RIGHT, padx = 5)
+        self.scale = tk.Scale(self.frame, from_ = 0, to = max(0, len(log) - 1), orient = tk.HORIZONTAL,
+                              showvalue = True, command = self._moved)
+        self.scale.pack(side = tk.LEFT, fill = tk.X, expand = True, padx = 5)
+
+    def _moved(self, value):
+        self.wanted = int(float(value))
+        if not self.scheduled:
+            self.scheduled = True
+            self.frame.after_idle(self._show)
+
+    def _show(self):
+        self.scheduled = False
+        if self.wanted != self.shown:
+            self.shown = self.wanted
+            self.on_step(self.wanted, *self.log.step(self.wanted))
+
+    def seek(self, step):
+        # moves the slider to a step, clipped to the log, which shows it:
+        self.scale.set(min(max(step, 0), len(self.log) - 1))
+
+    def toggle(self):
+        self.playing = not self.playing
+        self.play_button.config(text = "Pause" if self.playing else "Play")
+        if self.playing:
+            self.frame.after(self.interval, self._play)
+
+    def _play(self):
+        if not self.playing:
+            return
+        if self.wanted >= len(self.log) - 1:
+            self.toggle()
+            return
+        self.seek(self.wanted + self.play_steps)
+        self.frame.after(self.interval, self._play)
+
+    def reload(self):
+        # picks up steps recorded since the log was opened, for a mission that is still running:
+        self.scale.config(to = max(0, self.log.refresh() - 1))
+
+def load_map_arrays(log, map_name = None):
+    # the body, border and spawnable masks of the log's map, from the map cache by the key in the log, or
+    # preprocessed from map_name when the map isn't cached on this machine:
+    cached = MapCache().load_map(log.map_key) if log.map_key else None
+    if cached is None:
+        if map_name is None:
+            raise ValueError(f"Map {log.map_key} is not in the map cache, give the map's file name")
+        from .map import load_map
+        cached = load_map(map_name)[1:]
+    grid_map, spawnable, sites = cached
+    return grid_map.body_mask, grid_map.border_mask, spawnable
+
+def view(log, body, border, spawnable, w_frac = 0.60, h_frac = 0.80):
+    # this function opens the replay window of a trajectory log over its map:
+    window = tk.Tk()
+    window.title(f'Trajectory Replay - {log.file_path}')
+    fig_width, fig_height = int(window.winfo_screenwidth() * w_frac), int(window.winfo_screenheight() * h_frac)
+    window.geometry(f'{fig_width}x{fig_height}')
+    fig = plt.figure()
+    fig.set_size_inches(fig_width / 100, fig_height / 100)
+
+    canvas = tkagg.FigureCanvasTkAgg(fig, master = window)
+    ax = fig.add_subplot(111)
+    renderer = MapRenderer(ax, canvas, body, border, spawnable)
+
+    toolbar_frame = tk.Frame(window)
+    toolbar_frame.pack(side = tk.TOP, fill = tk.X)
+    NavigationToolbar2Tk(canvas, toolbar_frame).update()
+
+    sidebar_frame = tk.Frame(window, width = 300, bg = "lightgrey")
+    sidebar_frame.pack(side = tk.LEFT, fill = tk.Y, padx = 10, pady = 5)
+    step_label = tk.Label(sidebar_frame, anchor = 'w', bg = "lightgrey")
+    step_label.pack(anchor = 'w', padx = 5, pady = 2)
+    sidebar = Sidebar(sidebar_frame, label_width = 24)
+
+    def show(step, positions, battery, load):
+        renderer.move_robots(positions)
+        step_label.config(text = f"Step {step} of {len(log) - 1}")
+        sidebar.update([f"Robot {robot + 1}\nBattery: {battery[robot]:.3f}\nLoad History: {load[robot]}"
+                        for robot in range(log.n_robots)])
+
+    scrubber = Scrubber(window, log, show)
+    canvas.get_tk_widget().pack(side = tk.RIGHT, fill = tk.BOTH, expand = True)
+
+    positions, battery, load = log.step(0)
+    renderer.set_fleet(positions)
+    show(0, positions, battery, load)
+    window.mainloop()
+    return scrubber
+
+#################     Main   #####################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Replay a recorded trajectory log over its map.")
+    parser.add_argument('log', nargs = '?', default = 'saved_trajectory.rtrj', help = "path to the trajectory log")
+    parser.add_argument('--map', default = None, help = "map file name, if the log's map is not in the map cache")
+    args = parser.parse_args(argv)
+
+    log = TrajectoryLog(args.log)
+    if len(log) == 0:
+        raise ValueError(f"{args.log} has no recorded steps")
+    view(log, *load_map_arrays(log, args.map))
+
+if __name__ == "__main__":
+    main()